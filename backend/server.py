@@ -11,21 +11,715 @@ import subprocess
 import csv
 from pathlib import Path
 from datetime import datetime
-from flask import Flask, request, jsonify, Response
+from stat import filemode
+from flask import Flask, request, jsonify, Response, send_file, after_this_request
+from flask.wrappers import Request
 from flask_cors import CORS
+from werkzeug.formparser import FormDataParser, MultiPartParser
+from werkzeug.utils import secure_filename
 import threading
 import queue
 import time
 import platform
 import tarfile
 import shutil
+import sqlite3
+import hashlib
+import base64
+import io
+import select
+import socket
+import mmap
+import zipfile
+import contextlib
+import atexit
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+import uuid
+import json
+import re
+import asyncio
+import bisect
+import heapq
+import itertools
+import functools
+import weakref
+from collections import OrderedDict, deque
+from itertools import islice
 import requests
 
+try:
+    import numpy as np
+except ImportError:  # entropy maps need NumPy; signature scans work without it
+    np = None
+
+try:
+    from PIL import Image
+except ImportError:  # thumbnails are served at their embedded size without Pillow
+    Image = None
+
 app = Flask(__name__)
 CORS(app)
 
+# Job registry limits (override via environment)
+MAX_JOBS = int(os.environ.get("CHAMELEON_MAX_JOBS", 256))
+JOB_TTL_SECONDS = int(os.environ.get("CHAMELEON_JOB_TTL", 900))
+JOB_BUFFER_SIZE = int(os.environ.get("CHAMELEON_JOB_BUFFER", 5000))
+SSE_KEEPALIVE_SECONDS = 15
+SSE_BATCH_WINDOW_SECONDS = float(os.environ.get("CHAMELEON_SSE_BATCH_WINDOW_MS", 100)) / 1000
+SSE_BATCH_MAX_ITEMS = int(os.environ.get("CHAMELEON_SSE_BATCH_MAX_ITEMS", 200))
+
+
+class RegistryFull(Exception):
+    """Raised when every job slot is held by a job that is still running"""
+
+
+class Job:
+    """A single scan job and its replayable event log
+
+    Events are kept in a bounded ring buffer of (seq, message) pairs with
+    monotonically increasing sequence numbers, so any number of subscribers
+    can read the same stream and reconnecting clients can resume from the
+    last sequence number they saw. When the buffer is full the oldest event
+    is dropped.
+    """
+
+    def __init__(self, job_id, buffer_size=JOB_BUFFER_SIZE):
+        self.id = job_id
+        self.events = deque(maxlen=buffer_size)
+        self.last_seq = 0
+        self.subscribers = 0
+        self.created_at = time.time()
+        self.last_access = self.created_at
+        self.finished_at = None
+        self.failed = False
+        self.cache_key = None
+        self.header = {}  # item fields shared by every result, hoisted out in batched streams
+        self.idle_since = self.created_at  # when the subscriber count last dropped to zero
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.finished_at is not None
+
+    @property
+    def dropped(self):
+        return self.last_seq - len(self.events)
+
+    def put(self, message):
+        """Append a message to the event log and wake up every subscriber"""
+        with self._cond:
+            self.last_seq += 1
+            self.events.append((self.last_seq, message))
+            self._cond.notify_all()
+
+    def push(self, msg_type, payload=None):
+        """Encode a typed event and append it to the event log"""
+        self.put(json.dumps({"type": msg_type, **(payload or {})}))
+
+    def finish(self):
+        """Mark the job finished so subscribers stop once they have caught up"""
+        with self._cond:
+            if self.finished:
+                return
+            self.finished_at = time.time()
+            self._cond.notify_all()
+
+    def read(self, after, timeout):
+        """Return (events newer than seq `after`, finished), waiting up to timeout for new ones"""
+        with self._cond:
+            if self.last_seq <= after and not self.finished:
+                self._cond.wait(timeout)
+            if not self.events or self.last_seq <= after:
+                return [], self.finished
+            # Sequence numbers are contiguous, so index straight into the ring
+            start = max(0, after + 1 - self.events[0][0])
+            return list(islice(self.events, start, None)), self.finished
+
+    def subscribe(self):
+        with self._cond:
+            self.subscribers += 1
+
+    def unsubscribe(self):
+        with self._cond:
+            self.subscribers -= 1
+            if self.subscribers == 0:
+                self.idle_since = time.time()
+
+    def abandoned(self, grace):
+        """True when nobody has been subscribed for the last `grace` seconds"""
+        with self._cond:
+            return self.subscribers == 0 and time.time() - self.idle_since > grace
+
+
+class JobRegistry:
+    """Bounded, thread-safe job store with TTL and LRU eviction of finished jobs"""
+
+    def __init__(self, max_jobs=MAX_JOBS, ttl=JOB_TTL_SECONDS):
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self.created = 0
+        self.evicted = 0
+        self._jobs = OrderedDict()  # jobId -> Job, least recently used first
+        self._lock = threading.Lock()
+
+    def create(self):
+        """Register a new job, evicting finished jobs to make room if needed"""
+        with self._lock:
+            self._evict_expired()
+            if len(self._jobs) >= self.max_jobs:
+                self._evict_lru()
+            if len(self._jobs) >= self.max_jobs:
+                raise RegistryFull(f"{len(self._jobs)} jobs still running")
+
+            job = Job(uuid.uuid4().hex)
+            self._jobs[job.id] = job
+            self.created += 1
+            return job
+
+    def get(self, job_id):
+        """Look up a job and mark it as recently used"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.last_access = time.time()
+            self._jobs.move_to_end(job_id)
+            return job
+
+    def stats(self):
+        with self._lock:
+            live = sum(1 for job in self._jobs.values() if not job.finished)
+            return {
+                "live": live,
+                "finished": len(self._jobs) - live,
+                "capacity": self.max_jobs,
+                "created": self.created,
+                "evicted": self.evicted,
+                "subscribers": sum(job.subscribers for job in self._jobs.values()),
+                "droppedMessages": sum(job.dropped for job in self._jobs.values()),
+            }
+
+    def _evict_expired(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and now - job.finished_at > self.ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self.evicted += 1
+
+    def _evict_lru(self):
+        for job_id, job in self._jobs.items():
+            if job.finished:
+                del self._jobs[job_id]
+                self.evicted += 1
+                return
+
+
 # Store active jobs
-jobs = {}  # jobId -> { "buffer": queue.Queue() }
+jobs = JobRegistry()
+
+
+class ProcessEngine:
+    """Runs tool subprocesses on one shared asyncio event loop
+
+    A single background thread hosts the loop; every running scan is a
+    coroutine on it, and stdout/stderr of all child processes are drained
+    concurrently by stream readers instead of per-scan reader threads.
+    """
+
+    # Longest single output line accepted from a tool (maigret ndjson lines can be large)
+    LINE_LIMIT = 1024 * 1024
+
+    def __init__(self):
+        self.running = 0
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="process-engine", daemon=True)
+        self._thread.start()
+
+    def submit(self, coro):
+        """Schedule a coroutine on the engine loop from any thread"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def offload(self, fn, *args):
+        """Run blocking work (file parsing, SQLite, cleanup) on a worker thread so pipes keep draining"""
+        return await self.loop.run_in_executor(None, functools.partial(fn, *args))
+
+    async def run(self, args, on_stdout=None, on_stderr=None, cwd=None):
+        """Run args, feeding each decoded output line to the callbacks; returns the exit code"""
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd,
+            limit=self.LINE_LIMIT
+        )
+        self.running += 1
+        try:
+            await asyncio.gather(
+                self._drain(process.stdout, on_stdout),
+                self._drain(process.stderr, on_stderr)
+            )
+            return await process.wait()
+        finally:
+            self.running -= 1
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
+    @staticmethod
+    async def _drain(stream, callback):
+        while True:
+            try:
+                line = await stream.readline()
+            except ValueError:
+                # Line longer than LINE_LIMIT: asyncio discards it, keep reading
+                continue
+            if not line:
+                return
+            if callback:
+                callback(line.decode("utf-8", errors="replace"))
+
+
+engine = ProcessEngine()
+
+
+# Scan scheduler limits (override via environment)
+MAX_RUNNING_SCANS = int(os.environ.get("CHAMELEON_MAX_RUNNING", 8))
+MAX_PENDING_SCANS = int(os.environ.get("CHAMELEON_MAX_PENDING", 100))
+MAX_LOAD_PER_CPU = float(os.environ.get("CHAMELEON_MAX_LOAD", 2.0))
+TOOL_CONCURRENCY = {
+    "sherlock": int(os.environ.get("CHAMELEON_SHERLOCK_CONCURRENCY", 3)),
+    "holehe": int(os.environ.get("CHAMELEON_HOLEHE_CONCURRENCY", 3)),
+    "maigret": int(os.environ.get("CHAMELEON_MAIGRET_CONCURRENCY", 2)),
+    "harvester": int(os.environ.get("CHAMELEON_HARVESTER_CONCURRENCY", 2)),
+}
+PRIORITIES = {"interactive": 0, "bulk": 1}
+
+# Maximum theHarvester source processes per harvester scan
+HARVESTER_SOURCE_CONCURRENCY = int(os.environ.get("CHAMELEON_HARVESTER_SOURCE_CONCURRENCY", 3))
+
+
+class SchedulerBusy(Exception):
+    """Raised when the scheduler refuses to admit another scan"""
+
+
+class ScanScheduler:
+    """Runs scan coroutines on the process engine with global and per-tool caps
+
+    Pending scans wait in a priority-ordered queue (interactive before bulk,
+    then FIFO). While a scan waits, its job receives `queue` events with its
+    position among scans of the same tool and an ETA based on a moving
+    average of recent run times.
+    """
+
+    def __init__(self, max_running=MAX_RUNNING_SCANS, limits=TOOL_CONCURRENCY, max_pending=MAX_PENDING_SCANS,
+                 max_load=MAX_LOAD_PER_CPU):
+        self.max_running = max_running
+        self.limits = dict(limits)
+        self.max_pending = max_pending
+        self.max_load = max_load
+        self.completed = 0
+        self.rejected = 0
+        self._running = {tool: 0 for tool in self.limits}
+        self._durations = {}  # tool -> moving average of run time in seconds
+        self._pending = []  # sorted list of (priority, seq, task)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def submit(self, job, tool, target, args, priority="interactive"):
+        """Queue coroutine function target(job, *args) to run once a slot for `tool` is free"""
+        rank = PRIORITIES.get(priority, PRIORITIES["interactive"])
+        with self._lock:
+            self._admit(rank)
+            task = {"job": job, "tool": tool, "target": target, "args": args, "position": None}
+            bisect.insort(self._pending, (rank, next(self._seq), task))
+            self._dispatch()
+            self._announce()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": dict(self._running),
+                "pending": len(self._pending),
+                "limits": dict(self.limits),
+                "maxRunning": self.max_running,
+                "processes": engine.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avgDurations": {tool: round(avg, 1) for tool, avg in self._durations.items()},
+            }
+
+    def _admit(self, rank):
+        if len(self._pending) >= self.max_pending:
+            self.rejected += 1
+            raise SchedulerBusy(f"{len(self._pending)} scans already queued")
+        if rank > PRIORITIES["interactive"] and self._pending and load_per_cpu() > self.max_load:
+            self.rejected += 1
+            raise SchedulerBusy("system load too high for bulk scans")
+
+    def _dispatch(self):
+        """Start every pending task that fits under the global and per-tool caps"""
+        for entry in list(self._pending):
+            if sum(self._running.values()) >= self.max_running:
+                break
+            task = entry[2]
+            tool = task["tool"]
+            if self._running.get(tool, 0) >= self.limits.get(tool, 1):
+                continue
+            self._pending.remove(entry)
+            self._running[tool] = self._running.get(tool, 0) + 1
+            if task["position"] is not None:
+                task["job"].push("queue", {"status": "running"})
+            engine.submit(self._run(task))
+
+    def _announce(self):
+        """Send queue position/ETA events to waiting jobs whose position changed"""
+        positions = {}
+        for _, _, task in self._pending:
+            tool = task["tool"]
+            positions[tool] = positions.get(tool, 0) + 1
+            position = positions[tool]
+            if task["position"] == position:
+                continue
+            task["position"] = position
+            avg = self._durations.get(tool)
+            limit = self.limits.get(tool, 1)
+            eta = round(-(-position // limit) * avg) if avg is not None else None
+            task["job"].push("queue", {"status": "queued", "position": position, "eta": eta})
+
+    async def _run(self, task):
+        tool = task["tool"]
+        job = task["job"]
+        started = time.time()
+        try:
+            await task["target"](job, *task["args"])
+        except Exception as e:
+            print(f"[scheduler][job {job.id}] {tool} failed: {str(e)}")
+        finally:
+            job.finish()
+            elapsed = time.time() - started
+            with self._lock:
+                self._running[tool] -= 1
+                self.completed += 1
+                avg = self._durations.get(tool)
+                self._durations[tool] = elapsed if avg is None else 0.7 * avg + 0.3 * elapsed
+                self._dispatch()
+                self._announce()
+
+
+def load_per_cpu():
+    """1-minute load average per CPU, or 0 where unavailable"""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (OSError, AttributeError):
+        return 0.0
+
+
+scheduler = ScanScheduler()
+
+
+# Result cache settings (override via environment)
+CACHE_DIR = os.environ.get("CHAMELEON_CACHE_DIR", os.path.join(Path.home(), ".chameleon", "cache"))
+RESULT_CACHE_TTL = int(os.environ.get("CHAMELEON_RESULT_CACHE_TTL", 6 * 3600))
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("CHAMELEON_RESULT_CACHE_MAX_MB", 64)) * 1024 * 1024
+
+
+class BoundedStore:
+    """SQLite table of keyed entries capped in total size, evicted oldest `order_column` first
+
+    Base of the on-disk caches below; entries older than ttl (if set) are
+    dropped too. The byte total is tracked in memory, so a write that stays
+    under budget costs no extra queries. Subclasses hold self._lock around
+    the underscore helpers.
+    """
+
+    EVICT_BATCH = 64
+
+    def __init__(self, path, table, key_column, order_column, columns, max_bytes, ttl=None):
+        self.table = table
+        self.key_column = key_column
+        self.order_column = order_column
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.evicted = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            f"{key_column} TEXT PRIMARY KEY, {order_column} REAL, size INTEGER, {columns})"
+        )
+        self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_{order_column} ON {table} ({order_column})")
+        self._db.commit()
+        (self.bytes,) = self._db.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()
+        self._lock = threading.Lock()
+
+    def _fetch(self, key, fields):
+        return self._db.execute(f"SELECT {fields} FROM {self.table} WHERE {self.key_column} = ?", (key,)).fetchone()
+
+    def _touch(self, key):
+        self._db.execute(
+            f"UPDATE {self.table} SET {self.order_column} = ? WHERE {self.key_column} = ?", (time.time(), key)
+        )
+        self._db.commit()
+
+    def _store(self, key, size, stamp=None, **values):
+        """Insert or replace an entry and evict to fit; returns the keys evicted for size"""
+        previous = self._fetch(key, "size")
+        names = [self.key_column, self.order_column, "size", *values]
+        self._db.execute(
+            f"INSERT OR REPLACE INTO {self.table} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+            (key, stamp or time.time(), size, *values.values())
+        )
+        self.bytes += size - (previous[0] if previous else 0)
+        evicted = self._evict()
+        self._db.commit()
+        return evicted
+
+    def _stats(self):
+        (entries,) = self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        return {"entries": entries, "bytes": self.bytes, "evicted": self.evicted}
+
+    def _evict(self):
+        if self.ttl is not None:
+            cutoff = time.time() - self.ttl
+            count, size = self._db.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table} WHERE {self.order_column} < ?", (cutoff,)
+            ).fetchone()
+            if count:
+                self._db.execute(f"DELETE FROM {self.table} WHERE {self.order_column} < ?", (cutoff,))
+                self.bytes -= size
+                self.evicted += count
+        removed = []
+        while self.bytes > self.max_bytes:
+            rows = self._db.execute(
+                f"SELECT {self.key_column}, size FROM {self.table} ORDER BY {self.order_column} LIMIT ?",
+                (self.EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                self.bytes = 0
+                break
+            for key, size in rows:
+                if self.bytes <= self.max_bytes:
+                    break
+                self._db.execute(f"DELETE FROM {self.table} WHERE {self.key_column} = ?", (key,))
+                self.bytes -= size
+                self.evicted += 1
+                removed.append(key)
+        return removed
+
+
+class ResultCache(BoundedStore):
+    """SQLite-backed cache of scan result events with TTL and size-based eviction"""
+
+    def __init__(self, path, ttl=RESULT_CACHE_TTL, max_bytes=RESULT_CACHE_MAX_BYTES):
+        super().__init__(path, "results", "key", "created", "tool TEXT, events TEXT", max_bytes, ttl)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(tool, query, options=None):
+        """Cache key for a tool run: tool + normalized query + options"""
+        query = query.strip()
+        # Emails and domains are case-insensitive
+        if tool in ("holehe", "harvester"):
+            query = query.lower()
+        raw = json.dumps([tool, query, options or {}], sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return {"created", "events"} for a fresh entry, or None"""
+        with self._lock:
+            row = self._fetch(key, "created, events")
+            if row is None or time.time() - row[0] > self.ttl:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return {"created": row[0], "events": json.loads(row[1])}
+
+    def put(self, key, tool, events):
+        payload = json.dumps(events)
+        with self._lock:
+            self._store(key, len(payload), tool=tool, events=payload)
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats(), "hits": self.hits, "misses": self.misses}
+
+
+result_cache = ResultCache(os.path.join(CACHE_DIR, "results.sqlite3"))
+
+
+ANALYSIS_CACHE_MAX_BYTES = int(os.environ.get("CHAMELEON_ANALYSIS_CACHE_MAX_MB", 256)) * 1024 * 1024
+
+
+class AnalysisCache(BoundedStore):
+    """Content-addressed SQLite cache of file analysis reports keyed by SHA-256, evicted LRU by size"""
+
+    def __init__(self, path, max_bytes=ANALYSIS_CACHE_MAX_BYTES):
+        super().__init__(path, "reports", "sha256", "used", "report TEXT", max_bytes)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sha256):
+        """Return the cached report for this content hash, or None"""
+        with self._lock:
+            row = self._fetch(sha256, "report")
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(sha256)
+            return json.loads(row[0])
+
+    def put(self, sha256, report):
+        payload = json.dumps(report)
+        with self._lock:
+            self._store(sha256, len(payload), report=payload)
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats(), "hits": self.hits, "misses": self.misses}
+
+
+analysis_cache = AnalysisCache(os.path.join(CACHE_DIR, "analysis.sqlite3"))
+
+
+THUMBNAIL_STORE_MAX_BYTES = int(os.environ.get("CHAMELEON_THUMBNAIL_STORE_MAX_MB", 128)) * 1024 * 1024
+THUMBNAIL_SIZES = (64, 128, 256, 512)  # downscaled variants, longest edge in pixels
+
+
+class ThumbnailStore(BoundedStore):
+    """Content-addressed SQLite store of embedded thumbnails/previews and their downscaled variants"""
+
+    def __init__(self, path, max_bytes=THUMBNAIL_STORE_MAX_BYTES):
+        super().__init__(path, "images", "key", "used", "data BLOB", max_bytes)
+
+    def has(self, key):
+        with self._lock:
+            return self._fetch(key, "1") is not None
+
+    def get(self, key):
+        """Return the stored bytes for key (a SHA-256, or "<sha256>-<size>" for variants), or None"""
+        with self._lock:
+            row = self._fetch(key, "data")
+            if row is None:
+                return None
+            self._touch(key)
+            return bytes(row[0])
+
+    def put(self, key, data):
+        with self._lock:
+            self._store(key, len(data), data=data)
+
+    def stats(self):
+        with self._lock:
+            return self._stats()
+
+
+thumbnail_store = ThumbnailStore(os.path.join(CACHE_DIR, "thumbnails.sqlite3"))
+
+
+class InflightScans:
+    """Index of queued/running scans by key so identical requests share one job"""
+
+    def __init__(self):
+        self.attached = 0
+        self.lock = threading.Lock()
+        self._jobs = {}  # key -> Job
+
+    def get(self, key):
+        return self._jobs.get(key)
+
+    def add(self, key, job):
+        self._jobs[key] = job
+
+    def release(self, key, job):
+        with self.lock:
+            if self._jobs.get(key) is job:
+                del self._jobs[key]
+
+    def stats(self):
+        with self.lock:
+            return {"inflight": len(self._jobs), "attached": self.attached}
+
+
+inflight = InflightScans()
+
+
+def spawn_job(tool, target, *args, priority="interactive", key=None, use_cache=False, force=False):
+    """Register a job and schedule coroutine target(job, *args) on the process engine
+
+    With a key, an identical scan that is already queued or running is
+    shared instead of starting another tool process; its subscribers get a
+    full replay of the events so far. With use_cache, a fresh cached result
+    is replayed instead of running the tool (unless force is set), and a
+    clean run is stored.
+    """
+    if key is None:
+        return _start_job(tool, target, args, priority)
+
+    with inflight.lock:
+        job = inflight.get(key)
+        if job is not None:
+            inflight.attached += 1
+            print(f"[jobs] attaching {tool} request to in-flight job {job.id}")
+            return job
+
+        job = jobs.create()
+        job.cache_key = key if use_cache else None
+        cached = result_cache.get(key) if use_cache and not force else None
+        if cached is not None:
+            replay_cached_results(job, cached)
+            return job
+
+        _start_job(tool, track_scan(tool, target, key), args, priority, job)
+        inflight.add(key, job)
+        return job
+
+
+def _start_job(tool, target, args, priority, job=None):
+    job = job or jobs.create()
+    try:
+        scheduler.submit(job, tool, target, args, priority)
+    except SchedulerBusy:
+        job.finish()
+        raise
+    return job
+
+
+def track_scan(tool, target, key):
+    """Wrap a scan coroutine to cache a clean run and leave the in-flight index when done"""
+    def store(job):
+        events = [message for _, message in job.events if json.loads(message).get("type") == "result"]
+        result_cache.put(job.cache_key, tool, events)
+    
+    async def run(job, *args):
+        try:
+            await target(job, *args)
+            if job.cache_key and not job.failed and not job.dropped:
+                await engine.offload(store, job)
+        finally:
+            inflight.release(key, job)
+    return run
+
+
+def replay_cached_results(job, cached):
+    """Feed cached result events into a job and finish it immediately"""
+    age_minutes = int((time.time() - cached["created"]) // 60)
+    job.push("log", {
+        "text": f"Served {len(cached['events'])} cached result(s) from {age_minutes} min ago (send force to rescan)"
+    })
+    for message in cached["events"]:
+        job.put(message)
+    job.push("done")
+    job.finish()
+
+
+def busy_response(error):
+    print(f"[jobs] rejected: {error}")
+    response = jsonify({"error": "server busy, try again later"})
+    response.headers["Retry-After"] = "30"
+    return response, 503
 
 
 @app.route("/", methods=["GET"])
@@ -33,6 +727,17 @@ def health_check():
     return "ok", 200
 
 
+@app.route("/jobs/stats", methods=["GET"])
+def job_stats():
+    """Report job registry, in-flight, scheduler and result cache counters"""
+    return jsonify({
+        **jobs.stats(),
+        **inflight.stats(),
+        "scheduler": scheduler.stats(),
+        "resultCache": result_cache.stats()
+    })
+
+
 @app.route("/scan", methods=["POST"])
 def start_scan():
     """Start a Sherlock scan"""
@@ -44,17 +749,17 @@ def start_scan():
         print("[POST /scan] invalid body -> 400")
         return jsonify({"error": "missing query"}), 400
     
-    # Generate unique job ID
-    job_id = datetime.now().strftime("%s%f")
-    
-    # Create job with buffer queue
-    job_buffer = queue.Queue()
-    jobs[job_id] = {"buffer": job_buffer}
-    
-    # Start scan in background thread
-    thread = threading.Thread(target=run_sherlock_scan, args=(job_id, query, job_buffer))
-    thread.daemon = True
-    thread.start()
+    # Register job and queue scan on the scheduler
+    try:
+        job_id = spawn_job(
+            "sherlock", run_sherlock_scan, query,
+            priority=data.get("priority", "interactive"),
+            key=ResultCache.make_key("sherlock", query),
+            use_cache=True,
+            force=bool(data.get("force"))
+        ).id
+    except (RegistryFull, SchedulerBusy) as e:
+        return busy_response(e)
     
     print(f"[POST /scan] respond -> {{ jobId: \"{job_id}\" }}")
     return jsonify({"jobId": job_id})
@@ -62,39 +767,108 @@ def start_scan():
 
 @app.route("/stream/<job_id>", methods=["GET"])
 def stream_results(job_id):
-    """Stream scan results via Server-Sent Events"""
+    """Stream scan results via Server-Sent Events
+
+    Every subscriber gets the full event log from the start (or from the
+    `Last-Event-ID` header / `lastEventId` query arg when resuming).
+    With `?batch=1`, result events arriving within a short window are
+    coalesced into `batch` frames, and item fields shared by the whole job
+    are sent once in a `header` frame instead of in every item.
+    """
     job = jobs.get(job_id)
-    if not job:
+    if job is None:
         print(f"[SSE connect] job {job_id} NOT FOUND -> 404")
         return "Job not found", 404
     
-    print(f"[SSE connect] job {job_id} opened from {request.remote_addr}")
-    
-    def event_stream():
-        job_buffer = job["buffer"]
-        while True:
-            try:
-                # Get message from queue (blocks until available)
-                message = job_buffer.get(timeout=1.0)
-                if message is None:  # Sentinel value for done
-                    break
-                yield f"data: {message}\n\n"
-            except queue.Empty:
-                # Send keepalive
-                yield ": keepalive\n\n"
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("lastEventId", "0")
+    try:
+        after = max(0, int(last_event_id))
+    except ValueError:
+        after = 0
+    batch = request.args.get("batch", "").lower() in ("1", "true", "yes")
     
-    return Response(event_stream(), mimetype="text/event-stream")
-
-
-def run_sherlock_scan(job_id, query, job_buffer):
-    """Run Sherlock scan in background thread"""
+    print(f"[SSE connect] job {job_id} opened from {request.remote_addr} (after={after}, batch={batch})")
     
-    def push(msg_type, payload):
-        """Push message to SSE stream"""
-        import json
-        msg = json.dumps({"type": msg_type, **payload})
-        job_buffer.put(msg)
-        print(f"[SSE][job {job_id}] -> {msg}")
+    def event_stream(after):
+        header_sent = False
+        job.subscribe()
+        try:
+            while True:
+                events, finished = job.read(after, timeout=SSE_KEEPALIVE_SECONDS)
+                if not events:
+                    if finished:
+                        break
+                    # Send keepalive
+                    yield ": keepalive\n\n"
+                    continue
+                
+                if not batch:
+                    yield "".join(f"id: {seq}\ndata: {message}\n\n" for seq, message in events)
+                    after = events[-1][0]
+                    continue
+                
+                # Give the producer a short window to add more events before flushing
+                deadline = time.monotonic() + SSE_BATCH_WINDOW_SECONDS
+                while not finished and len(events) < SSE_BATCH_MAX_ITEMS:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    more, finished = job.read(events[-1][0], timeout=remaining)
+                    events.extend(more)
+                
+                frames = []
+                if job.header and not header_sent:
+                    header_sent = True
+                    frames.append(f"data: {compact_json({'type': 'header', 'fields': job.header})}\n\n")
+                frames.extend(encode_batch_frames(events, job.header))
+                yield "".join(frames)
+                after = events[-1][0]
+        finally:
+            job.unsubscribe()
+    
+    return Response(event_stream(after), mimetype="text/event-stream")
+
+
+def compact_json(value):
+    return json.dumps(value, separators=(",", ":"))
+
+
+def encode_batch_frames(events, header):
+    """Encode events as SSE frames, coalescing consecutive results into batch frames"""
+    frames = []
+    items = []
+    last_seq = None
+    
+    def flush():
+        if items:
+            frames.append(f"id: {last_seq}\ndata: {compact_json({'type': 'batch', 'items': items})}\n\n")
+            items.clear()
+    
+    for seq, message in events:
+        event = json.loads(message)
+        if event.get("type") != "result":
+            flush()
+            frames.append(f"id: {seq}\ndata: {message}\n\n")
+            continue
+        # Batch items are flat, so any other event fields travel inside the item
+        item = {**{key: value for key, value in event.items() if key not in ("type", "item")}, **event["item"]}
+        for key, value in header.items():
+            if item.get(key) == value:
+                del item[key]
+        items.append(item)
+        last_seq = seq
+        if len(items) >= SSE_BATCH_MAX_ITEMS:
+            flush()
+    flush()
+    return frames
+
+
+async def run_sherlock_scan(job, query):
+    """Run Sherlock scan on the process engine"""
+    job_id = job.id
+    job.header = {"snippet": query}
+    
+    push = job.push
     
     # Create temporary directory for Sherlock output
     work_dir = tempfile.mkdtemp(prefix="chameleon-")
@@ -105,6 +879,7 @@ def run_sherlock_scan(job_id, query, job_buffer):
         
         if not sherlock_bin:
             push("log", {"text": "ERROR: Sherlock not found. Please install: pip install sherlock-project"})
+            job.failed = True
             push("done", {})
             return
         
@@ -113,69 +888,55 @@ def run_sherlock_scan(job_id, query, job_buffer):
         
         print(f"[spawn] {' '.join(args)}  (cwd={work_dir})")
         
-        # Run Sherlock
-        process = subprocess.Popen(
-            args,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            cwd=work_dir,
-            text=True,
-            bufsize=1
-        )
-        
-        # Stream stdout
-        def read_stream(stream, label):
-            for line in iter(stream.readline, ''):
-                if line:
-                    push("log", {"text": line})
+        # IDs of results already sent, shared with the CSV reconciliation below
+        sent = set()
         
-        # Create threads to read stdout/stderr
-        stdout_thread = threading.Thread(target=read_stream, args=(process.stdout, "stdout"))
-        stderr_thread = threading.Thread(target=read_stream, args=(process.stderr, "stderr"))
-        stdout_thread.daemon = True
-        stderr_thread.daemon = True
-        stdout_thread.start()
-        stderr_thread.start()
+        # Run Sherlock, streaming stdout/stderr lines as logs and
+        # "[+] Site: URL" hits from --print-found as results
+        def handle_line(line):
+            push("log", {"text": line})
+            match = SHERLOCK_HIT.match(line)
+            if match:
+                send_sherlock_result(match.group(1).strip(), match.group(2), query, push, sent)
         
-        # Wait for completion
-        return_code = process.wait()
+        def log_line(line):
+            push("log", {"text": line})
         
-        # Give threads a moment to finish reading
-        stdout_thread.join(timeout=2)
-        stderr_thread.join(timeout=2)
+        return_code = await engine.run(args, on_stdout=handle_line, on_stderr=log_line, cwd=work_dir)
         
-        print(f"[spawn close][job {job_id}] code={return_code}")
-        
-        # Small delay to ensure file is written
-        import time
-        time.sleep(0.5)
+        print(f"[spawn close][job {job_id}] code={return_code}, {len(sent)} live results")
+
+        if return_code != 0:
+            # Keep a crashed or offline run out of the result cache
+            job.failed = True
+            push("log", {"text": f"Sherlock exited with code {return_code}"})
         
-        # Parse CSV results BEFORE cleanup
-        csv_path = find_csv_for_user(work_dir, query)
+        # Reconcile with the CSV BEFORE cleanup: it is complete once the process has exited
+        csv_path = await engine.offload(find_csv_for_user, work_dir, query)
         print(f"[parse][job {job_id}] csvPath={csv_path or '(none)'}")
         
         if not csv_path:
             push("log", {"text": "No CSV file produced by Sherlock."})
         else:
-            print(f"[parse][job {job_id}] Found CSV, parsing...")
-            parse_and_send_results(csv_path, query, push)
-            print(f"[parse][job {job_id}] CSV parsing complete")
+            print(f"[parse][job {job_id}] Found CSV, reconciling...")
+            await engine.offload(parse_and_send_results, csv_path, query, push, sent)
+            print(f"[parse][job {job_id}] CSV reconciliation complete, {len(sent)} results")
         
     except Exception as e:
         print(f"[ERROR][job {job_id}] {str(e)}")
         push("log", {"text": f"Error: {str(e)}"})
+        job.failed = True
     
     finally:
         # Cleanup temp directory
         try:
-            import shutil
-            shutil.rmtree(work_dir)
+            await engine.offload(shutil.rmtree, work_dir)
         except Exception as e:
             print(f"[cleanup][job {job_id}] {str(e)}")
         
         # Signal completion
         push("done", {})
-        job_buffer.put(None)  # Sentinel
+        job.finish()
 
 
 def find_sherlock():
@@ -191,15 +952,7 @@ def find_sherlock():
         if os.path.exists(loc):
             return loc
     
-    # Try 'which sherlock'
-    try:
-        result = subprocess.run(["which", "sherlock"], capture_output=True, text=True)
-        if result.returncode == 0:
-            return result.stdout.strip()
-    except:
-        pass
-    
-    return None
+    return shutil.which("sherlock")
 
 
 def find_csv_for_user(directory, query):
@@ -221,8 +974,32 @@ def find_csv_for_user(directory, query):
     return None
 
 
-def parse_and_send_results(csv_path, query, push):
-    """Parse Sherlock CSV and send results"""
+# A confirmed hit in Sherlock's --print-found output: "[+] GitHub: https://github.com/user"
+SHERLOCK_HIT = re.compile(r'^\[\+\]\s*([^:]+?):\s*(https?://\S+)')
+
+
+def send_sherlock_result(site, url_user, query, push, sent):
+    """Send a Sherlock result unless one with the same ID was already sent"""
+    item_id = f"{site}:{url_user or query}"
+    if item_id in sent:
+        return
+    sent.add(item_id)
+    item = {
+        "id": item_id,
+        "site": site,
+        "title": f"{site} match for \"{query}\"",
+        "url": url_user,
+        "snippet": query,
+        "severity": infer_severity(site.lower()),
+        "confidence": 0.9
+    }
+    push("result", {"item": item})
+
+
+def parse_and_send_results(csv_path, query, push, sent=None):
+    """Parse Sherlock CSV and send results not already in `sent`"""
+    if sent is None:
+        sent = set()
     try:
         with open(csv_path, 'r', encoding='utf-8') as f:
             reader = csv.DictReader(f)
@@ -246,16 +1023,7 @@ def parse_and_send_results(csv_path, query, push):
                 )
                 
                 if found:
-                    item = {
-                        "id": f"{site}:{url_user or query}",
-                        "site": site,
-                        "title": f"{site} match for \"{query}\"",
-                        "url": url_user,
-                        "snippet": query,
-                        "severity": infer_severity(site.lower()),
-                        "confidence": 0.9
-                    }
-                    push("result", {"item": item})
+                    send_sherlock_result(site, url_user, query, push, sent)
     
     except Exception as e:
         push("log", {"text": f"Error parsing CSV: {str(e)}"})
@@ -283,31 +1051,28 @@ def start_holehe_scan():
         print("[POST /holehe/scan] invalid body -> 400")
         return jsonify({"error": "missing email"}), 400
     
-    # Generate unique job ID
-    job_id = datetime.now().strftime("%s%f")
-    
-    # Create job with buffer queue
-    job_buffer = queue.Queue()
-    jobs[job_id] = {"buffer": job_buffer}
-    
-    # Start scan in background thread
-    thread = threading.Thread(target=run_holehe_scan, args=(job_id, email, job_buffer))
-    thread.daemon = True
-    thread.start()
+    # Register job and queue scan on the scheduler
+    try:
+        job_id = spawn_job(
+            "holehe", run_holehe_scan, email,
+            priority=data.get("priority", "interactive"),
+            key=ResultCache.make_key("holehe", email),
+            use_cache=True,
+            force=bool(data.get("force"))
+        ).id
+    except (RegistryFull, SchedulerBusy) as e:
+        return busy_response(e)
     
     print(f"[POST /holehe/scan] respond -> {{ jobId: \"{job_id}\" }}")
     return jsonify({"jobId": job_id})
 
 
-def run_holehe_scan(job_id, email, job_buffer):
-    """Run holehe scan in background thread"""
+async def run_holehe_scan(job, email):
+    """Run holehe scan on the process engine"""
+    job_id = job.id
+    job.header = {"email": email}
     
-    def push(msg_type, payload):
-        """Push message to SSE stream"""
-        import json
-        msg = json.dumps({"type": msg_type, **payload})
-        job_buffer.put(msg)
-        print(f"[SSE][job {job_id}] -> {msg}")
+    push = job.push
     
     try:
         # Find holehe executable
@@ -315,6 +1080,7 @@ def run_holehe_scan(job_id, email, job_buffer):
         
         if not holehe_bin:
             push("log", {"text": "ERROR: holehe not found. Please install: pip install holehe"})
+            job.failed = True
             push("done", {})
             return
         
@@ -323,102 +1089,66 @@ def run_holehe_scan(job_id, email, job_buffer):
         
         print(f"[spawn] {' '.join(args)}")
         
-        # Run holehe
-        process = subprocess.Popen(
-            args,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
-        )
-        
         # Track found sites
         found_sites = []
         
-        # Read both stdout and stderr line by line
-        import select
-        while True:
-            # Check if process is done
-            if process.poll() is not None:
-                break
-                
-            # Read any available output
-            line = process.stdout.readline()
-            if line:
-                line = line.strip()
-                print(f"[holehe output] {line}")
-                
-                # Parse holehe output: [+] site_name or site_name (without [+])
-                # Holehe sometimes outputs just the site name without [+]
-                if line.startswith('[+]'):
-                    site = line[3:].strip()
-                    site_lc = site.lower()
-                    # Skip legend/header or noisy lines
-                    if ('email used' in site_lc) or ('not used' in site_lc) or ('rate limit' in site_lc):
-                        continue
-                    # Skip if it's the email address itself
-                    if '@' in site:
-                        continue
-                    # Only accept domain-ish or slug names without spaces/brackets
-                    import re
-                    if re.match(r'^[A-Za-z0-9._-]{2,50}$', site) or ('.' in site and ' ' not in site and '[' not in site and ']' not in site):
-                        if site not in found_sites:
-                            found_sites.append(site)
-                            # Send result immediately
-                            item = {
-                                "id": f"site:{site}",
-                                "type": "site",
-                                "value": site,
-                                "email": email,
-                            }
-                            push("result", {"item": item})
-                # Also capture lines that look like site names (lowercase with possible dots/dashes)
-                elif line and not line.startswith('[') and not line.startswith('For ') and not line.startswith('*') and not '%' in line:
-                    # Skip if it's the email address itself
-                    if '@' in line:
-                        continue
-                    # Check if it's a valid site name pattern
-                    if line and len(line) < 50 and not ' ' in line and ('.' in line or line.islower()):
-                        ll = line.lower()
-                        if ('email used' in ll) or ('not used' in ll) or ('rate limit' in ll):
-                            continue
-                        if line not in found_sites and line not in ['twitter', 'github']:
-                            found_sites.append(line)
-                            
-                            # Send result immediately
-                            item = {
-                                "id": f"site:{line}",
-                                "type": "site",
-                                "value": line,
-                                "email": email,
-                            }
-                            push("result", {"item": item})
-        
-        # Read any remaining output
-        remaining = process.stdout.read()
-        if remaining:
-            for line in remaining.split('\n'):
-                line = line.strip()
-                if line.startswith('[+]'):
-                    site = line[3:].strip()
-                    site_lc = site.lower()
-                    if ('email used' in site_lc) or ('not used' in site_lc) or ('rate limit' in site_lc):
-                        continue
-                    import re
-                    if (re.match(r'^[A-Za-z0-9._-]{2,50}$', site) or ('.' in site and ' ' not in site)) and site not in found_sites:
-                        found_sites.append(site)
-                        item = {
-                            "id": f"site:{site}",
-                            "type": "site",
-                            "value": site,
-                            "email": email,
-                        }
-                        push("result", {"item": item})
-        
-        # Wait for completion
-        return_code = process.wait()
+        def add_site(site):
+            if site in found_sites:
+                return
+            found_sites.append(site)
+            # Send result immediately
+            item = {
+                "id": f"site:{site}",
+                "type": "site",
+                "value": site,
+                "email": email,
+            }
+            push("result", {"item": item})
+        
+        def handle_line(line):
+            line = line.strip()
+            if not line:
+                return
+            
+            # Parse holehe output: [+] site_name or site_name (without [+])
+            # Holehe sometimes outputs just the site name without [+]
+            if line.startswith('[+]'):
+                site = line[3:].strip()
+                site_lc = site.lower()
+                # Skip legend/header or noisy lines
+                if ('email used' in site_lc) or ('not used' in site_lc) or ('rate limit' in site_lc):
+                    return
+                # Skip if it's the email address itself
+                if '@' in site:
+                    return
+                # Only accept domain-ish or slug names without spaces/brackets
+                if re.match(r'^[A-Za-z0-9._-]{2,50}$', site) or ('.' in site and ' ' not in site and '[' not in site and ']' not in site):
+                    add_site(site)
+            # Also capture lines that look like site names (lowercase with possible dots/dashes)
+            elif not line.startswith('[') and not line.startswith('For ') and not line.startswith('*') and not '%' in line:
+                # Skip if it's the email address itself
+                if '@' in line:
+                    return
+                # Check if it's a valid site name pattern
+                if len(line) < 50 and not ' ' in line and ('.' in line or line.islower()):
+                    ll = line.lower()
+                    if ('email used' in ll) or ('not used' in ll) or ('rate limit' in ll):
+                        return
+                    if line not in ['twitter', 'github']:
+                        add_site(line)
+        
+        def drop_line(line):
+            # stderr only carries holehe's progress bar; drain it so the pipe never fills
+            pass
+        
+        # Run holehe
+        return_code = await engine.run(args, on_stdout=handle_line, on_stderr=drop_line)
         print(f"[spawn close][job {job_id}] code={return_code}")
+
+        if return_code != 0:
+            # Keep a crashed or offline run out of the result cache
+            job.failed = True
+            push("log", {"text": f"holehe exited with code {return_code}"})
         
         # Send final summary
         if len(found_sites) > 0:
@@ -429,11 +1159,12 @@ def run_holehe_scan(job_id, email, job_buffer):
     except Exception as e:
         print(f"[ERROR][job {job_id}] {str(e)}")
         push("log", {"text": f"Error: {str(e)}"})
+        job.failed = True
     
     finally:
         # Signal completion
         push("done", {})
-        job_buffer.put(None)  # Sentinel
+        job.finish()
 
 
 def find_command(cmd):
@@ -453,35 +1184,29 @@ def start_maigret_scan():
         print("[POST /maigret/scan] invalid body -> 400")
         return jsonify({"error": "missing username"}), 400
     
-    # Generate unique job ID
-    job_id = datetime.now().strftime("%s%f")
-    
-    # Create job with buffer queue
-    job_buffer = queue.Queue()
-    jobs[job_id] = {"buffer": job_buffer}
-    
-    # Start scan in background thread
-    print(f"[DEBUG] Creating thread for job {job_id}")
-    thread = threading.Thread(target=run_maigret_scan, args=(job_id, username, job_buffer))
-    thread.daemon = True
-    print(f"[DEBUG] Starting thread...")
-    thread.start()
-    print(f"[DEBUG] Thread started, is_alive: {thread.is_alive()}")
+    # Register job and queue scan on the scheduler
+    try:
+        job_id = spawn_job(
+            "maigret", run_maigret_scan, username,
+            priority=data.get("priority", "interactive"),
+            key=ResultCache.make_key("maigret", username),
+            use_cache=True,
+            force=bool(data.get("force"))
+        ).id
+    except (RegistryFull, SchedulerBusy) as e:
+        return busy_response(e)
+    print(f"[DEBUG] Scan queued for job {job_id}")
     
     print(f"[POST /maigret/scan] respond -> {{ jobId: \"{job_id}\" }}")
     return jsonify({"jobId": job_id})
 
 
-def run_maigret_scan(job_id, username, job_buffer):
-    """Run maigret scan in background thread"""
+async def run_maigret_scan(job, username):
+    """Run maigret scan on the process engine"""
+    job_id = job.id
     print(f"[DEBUG] run_maigret_scan started for job {job_id}, username: {username}")
     
-    def push(msg_type, payload):
-        """Push message to SSE stream"""
-        import json
-        msg = json.dumps({"type": msg_type, **payload})
-        job_buffer.put(msg)
-        print(f"[SSE][job {job_id}] -> {msg}")
+    push = job.push
     
     print(f"[DEBUG] push function defined")
     try:
@@ -491,6 +1216,7 @@ def run_maigret_scan(job_id, username, job_buffer):
         
         if not maigret_bin:
             push("log", {"text": "ERROR: maigret not found. Please install: pip install maigret"})
+            job.failed = True
             push("done", {})
             return
         
@@ -506,133 +1232,81 @@ def run_maigret_scan(job_id, username, job_buffer):
         print(f"[spawn] {' '.join(args)}")
         push("log", {"text": f"Starting Maigret scan for username: {username}"})
         
-        # Run maigret
-        process = subprocess.Popen(
-            args,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
-        )
-        
         # Track found sites and emit stderr logs for visibility
         found_sites = set()
         
-        # Read output line by line - with --json ndjson, each line is a JSON object
-        while True:
-            # Check if process is done
-            if process.poll() is not None:
-                break
-                
-            # Read any available output
-            line = process.stdout.readline()
-            if line:
-                line = line.strip()
-                if line:
-                    print(f"[maigret output] {line}")
-                    
-                    # Try to parse as JSON (ndjson format)
-                    try:
-                        import json
-                        data = json.loads(line)
-                        
-                        # Check if this is a found result
-                        # Maigret ndjson format: {"site": "SiteName", "url": "...", "status": {...}}
-                        if isinstance(data, dict):
-                            site_name = data.get('site') or data.get('sitename') or data.get('name')
-                            url = data.get('url') or data.get('url_user') or data.get('link')
-                            status = data.get('status', {})
-                            
-                            # Check if profile was found
-                            is_found = False
-                            if isinstance(status, dict):
-                                # Status might have 'status' or 'exists' field
-                                status_val = str(status.get('status', '')).lower()
-                                exists_val = str(status.get('exists', '')).lower()
-                                is_found = 'claimed' in status_val or 'found' in status_val or exists_val == 'true'
-                            elif url and url.startswith('http'):
-                                is_found = True
-                            
-                            if is_found and site_name and url and site_name not in found_sites:
-                                found_sites.add(site_name)
-                                print(f"[DEBUG] Found site: {site_name} -> {url}")
-                                
-                                # Send result immediately
-                                item = {
-                                    "id": f"site:{site_name}",
-                                    "type": "site",
-                                    "value": site_name,
-                                    "url": url,
-                                }
-                                push("result", {"item": item})
-                    except json.JSONDecodeError:
-                        # Not JSON, might be progress message; try fallback parser "[+] Site: URL"
-                        if line.startswith('[+]') and ':' in line:
-                            try:
-                                after = line[3:].strip()
-                                site_part, url_part = after.split(':', 1)
-                                site_name = site_part.strip()
-                                url = url_part.strip().split()[0]
-                                if site_name and url.startswith('http') and site_name not in found_sites:
-                                    found_sites.add(site_name)
-                                    item = {"id": f"site:{site_name}", "type": "site", "value": site_name, "url": url}
-                                    push("result", {"item": item})
-                            except Exception:
-                                pass
-        
-        # Read and log any stderr (errors/progress)
-        try:
-            for err_line in process.stderr:
-                err_line = err_line.strip()
-                if err_line:
-                    print(f"[maigret stderr] {err_line}")
-                    push("log", {"text": err_line})
-        except Exception:
-            pass
-
-        # Read any remaining output
-        remaining = process.stdout.read()
-        if remaining:
-            for line in remaining.split('\n'):
-                line = line.strip()
-                if line:
-                    print(f"[maigret output] {line}")
+        def add_site(site_name, url):
+            if site_name in found_sites:
+                return
+            found_sites.add(site_name)
+            
+            # Send result immediately
+            item = {
+                "id": f"site:{site_name}",
+                "type": "site",
+                "value": site_name,
+                "url": url,
+            }
+            push("result", {"item": item})
+        
+        # With -J ndjson each stdout line is a JSON object
+        def handle_line(line):
+            line = line.strip()
+            if not line:
+                return
+            
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                # Not JSON, might be progress message; try fallback parser "[+] Site: URL"
+                if line.startswith('[+]') and ':' in line:
                     try:
-                        import json
-                        data = json.loads(line)
-                        if isinstance(data, dict):
-                            site_name = data.get('site') or data.get('sitename') or data.get('name')
-                            url = data.get('url') or data.get('url_user') or data.get('link')
-                            status = data.get('status', {})
-                            
-                            is_found = False
-                            if isinstance(status, dict):
-                                status_val = str(status.get('status', '')).lower()
-                                exists_val = str(status.get('exists', '')).lower()
-                                is_found = 'claimed' in status_val or 'found' in status_val or exists_val == 'true'
-                            elif url and url.startswith('http'):
-                                is_found = True
-                            
-                            if is_found and site_name and url and site_name not in found_sites:
-                                found_sites.add(site_name)
-                                item = {
-                                    "id": f"site:{site_name}",
-                                    "type": "site",
-                                    "value": site_name,
-                                    "url": url,
-                                }
-                                push("result", {"item": item})
-                    except:
+                        after = line[3:].strip()
+                        site_part, url_part = after.split(':', 1)
+                        site_name = site_part.strip()
+                        url = url_part.strip().split()[0]
+                        if site_name and url.startswith('http'):
+                            add_site(site_name, url)
+                    except Exception:
                         pass
+                return
+            
+            # Maigret ndjson format: {"site": "SiteName", "url": "...", "status": {...}}
+            if isinstance(data, dict):
+                site_name = data.get('site') or data.get('sitename') or data.get('name')
+                url = data.get('url') or data.get('url_user') or data.get('link')
+                status = data.get('status', {})
+                
+                # Check if profile was found
+                is_found = False
+                if isinstance(status, dict):
+                    # Status might have 'status' or 'exists' field
+                    status_val = str(status.get('status', '')).lower()
+                    exists_val = str(status.get('exists', '')).lower()
+                    is_found = 'claimed' in status_val or 'found' in status_val or exists_val == 'true'
+                elif url and url.startswith('http'):
+                    is_found = True
+                
+                if is_found and site_name and url:
+                    add_site(site_name, url)
+        
+        # Forward stderr (errors/progress) as logs while the scan runs
+        def log_stderr(line):
+            line = line.strip()
+            if line:
+                push("log", {"text": line})
         
-        # Wait for completion
-        return_code = process.wait()
+        # Run maigret
+        return_code = await engine.run(args, on_stdout=handle_line, on_stderr=log_stderr)
         print(f"[spawn close][job {job_id}] code={return_code}, found {len(found_sites)} sites")
+
+        if return_code != 0:
+            # Keep a crashed or offline run out of the result cache
+            job.failed = True
+            push("log", {"text": f"maigret exited with code {return_code}"})
         
         # Clean up temp directory
-        import shutil
-        shutil.rmtree(work_dir, ignore_errors=True)
+        await engine.offload(shutil.rmtree, work_dir, True)
         
         # Send final summary
         if len(found_sites) > 0:
@@ -643,11 +1317,12 @@ def run_maigret_scan(job_id, username, job_buffer):
     except Exception as e:
         print(f"[ERROR][job {job_id}] {str(e)}")
         push("log", {"text": f"Error: {str(e)}"})
+        job.failed = True
     
     finally:
         # Signal completion
         push("done", {})
-        job_buffer.put(None)  # Sentinel
+        job.finish()
 
 
 @app.route("/harvester/scan", methods=["POST"])
@@ -668,24 +1343,24 @@ def start_harvester_scan():
         "sources": data.get("sources", "crtsh,hackertarget,dnsdumpster,virustotal,otx,rapiddns")
     }
     
-    # Generate unique job ID
-    job_id = datetime.now().strftime("%s%f")
-    
-    # Create job with buffer queue
-    job_buffer = queue.Queue()
-    jobs[job_id] = {"buffer": job_buffer}
-    
-    # Start scan in background thread
-    thread = threading.Thread(target=run_harvester_scan, args=(job_id, domain, job_buffer, options))
-    thread.daemon = True
-    thread.start()
+    # Register job and queue scan on the scheduler
+    try:
+        job_id = spawn_job(
+            "harvester", run_harvester_scan, domain, options,
+            priority=data.get("priority", "interactive"),
+            key=ResultCache.make_key("harvester", domain, options)
+        ).id
+    except (RegistryFull, SchedulerBusy) as e:
+        return busy_response(e)
     
     print(f"[POST /harvester/scan] respond -> {{ jobId: \"{job_id}\" }}")
     return jsonify({"jobId": job_id})
 
 
-def run_harvester_scan(job_id, domain, job_buffer, options=None):
-    """Run theHarvester scan in background thread"""
+async def run_harvester_scan(job, domain, options=None):
+    """Run theHarvester on the process engine, one process per source"""
+    job_id = job.id
+    job.header = {"domain": domain}
     
     if options is None:
         options = {
@@ -694,16 +1369,10 @@ def run_harvester_scan(job_id, domain, job_buffer, options=None):
             "sources": "crtsh,hackertarget,dnsdumpster"
         }
     
-    def push(msg_type, payload):
-        """Push message to SSE stream"""
-        import json
-        msg = json.dumps({"type": msg_type, **payload})
-        job_buffer.put(msg)
-        print(f"[SSE][job {job_id}] -> {msg}")
+    push = job.push
     
     # Create temporary directory for output
     work_dir = tempfile.mkdtemp(prefix="harvester-")
-    output_file = os.path.join(work_dir, "results.json")
     
     try:
         # Find theHarvester executable
@@ -711,99 +1380,104 @@ def run_harvester_scan(job_id, domain, job_buffer, options=None):
         
         if not harvester_bin:
             push("log", {"text": "ERROR: theHarvester not found. Please install: pip install theHarvester"})
+            job.failed = True
             push("done", {})
             return
         
-        # Build command - use free sources that don't require API keys
-        args = [
-            harvester_bin,
-            "-d", domain,
-            "-b", options["sources"],
-            "-f", output_file,
-            "-l", "200"  # Increased limit for more results
-        ]
+        sources = list(dict.fromkeys(s.strip() for s in options["sources"].split(",") if s.strip()))
         
         # Add DNS resolution if enabled
+        extra_args = []
         if options.get("dns_resolve"):
-            args.append("-n")
+            extra_args.append("-n")
             push("log", {"text": "DNS resolution enabled"})
         
-        # Add DNS brute force if enabled
+        # DNS brute force doesn't depend on the source, so only the first process runs it
         if options.get("dns_brute"):
-            args.append("-c")
             push("log", {"text": "DNS brute force enabled (this may take longer)"})
         
-        # Always quiet mode to suppress API warnings
-        args.append("-q")
-        
-        print(f"[spawn] {' '.join(args)}  (cwd={work_dir})")
-        
-        # Run theHarvester
-        process = subprocess.Popen(
-            args,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            cwd=work_dir,
-            text=True,
-            bufsize=1
-        )
-        
-        # Stream stdout
-        def read_stream(stream, label):
-            for line in iter(stream.readline, ''):
-                if line:
-                    push("log", {"text": line.rstrip()})
-        
-        # Create threads to read stdout/stderr
-        stdout_thread = threading.Thread(target=read_stream, args=(process.stdout, "stdout"))
-        stderr_thread = threading.Thread(target=read_stream, args=(process.stderr, "stderr"))
-        stdout_thread.daemon = True
-        stderr_thread.daemon = True
-        stdout_thread.start()
-        stderr_thread.start()
-        
-        # Wait for completion
-        return_code = process.wait()
+        # Dedup index of result IDs shared by every source; parses run off the loop one at a time
+        seen = set()
+        parse_lock = threading.Lock()
         
-        # Give threads a moment to finish reading
-        stdout_thread.join(timeout=2)
-        stderr_thread.join(timeout=2)
+        def parse_source(json_path, source):
+            with parse_lock:
+                parse_harvester_results(json_path, domain, push, seen, label=source)
+        slots = asyncio.Semaphore(HARVESTER_SOURCE_CONCURRENCY)
         
-        print(f"[spawn close][job {job_id}] code={return_code}")
-        
-        # Small delay to ensure file is written
-        time.sleep(0.5)
+        def log_line(line):
+            push("log", {"text": line.rstrip()})
         
-        # Parse JSON results - theHarvester automatically appends .json to the filename
-        json_path = output_file + ".json"
+        async def run_source(index, source):
+            async with slots:
+                output_file = os.path.join(work_dir, f"results-{index}")
+                
+                # Build command - use free sources that don't require API keys
+                args = [
+                    harvester_bin,
+                    "-d", domain,
+                    "-b", source,
+                    "-f", output_file,
+                    "-l", "200"  # Increased limit for more results
+                ] + extra_args
+                if options.get("dns_brute") and index == 0:
+                    args.append("-c")
+                
+                # Always quiet mode to suppress API warnings
+                args.append("-q")
+                
+                print(f"[spawn] {' '.join(args)}  (cwd={work_dir})")
+                return_code = await engine.run(args, on_stdout=log_line, on_stderr=log_line, cwd=work_dir)
+                print(f"[spawn close][job {job_id}] source={source} code={return_code}")
+                if return_code != 0:
+                    # Keep a crashed or offline run out of the result cache
+                    job.failed = True
+                    push("log", {"text": f"{source}: theHarvester exited with code {return_code}"})
+            
+            # Parse JSON results - theHarvester automatically appends .json to the filename
+            json_path = output_file + ".json"
+            
+            # Also check if results were written without the extra .json
+            if not os.path.exists(json_path) and os.path.exists(output_file):
+                json_path = output_file
+            
+            if os.path.exists(json_path):
+                await engine.offload(parse_source, json_path, source)
+            else:
+                print(f"[parse][job {job_id}] No results file for {source}. Checked: {json_path} and {output_file}")
+                push("log", {"text": f"{source}: no results file produced"})
         
-        # Also check if results were written without the extra .json
-        if not os.path.exists(json_path) and os.path.exists(output_file):
-            json_path = output_file
+        # Stream each source's results as soon as that source finishes
+        outcomes = await asyncio.gather(
+            *(run_source(index, source) for index, source in enumerate(sources)),
+            return_exceptions=True
+        )
+        for source, outcome in zip(sources, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"[ERROR][job {job_id}] source={source} {str(outcome)}")
+                push("log", {"text": f"{source}: error: {str(outcome)}"})
         
-        if os.path.exists(json_path):
-            print(f"[parse][job {job_id}] Found JSON at {json_path}, parsing...")
-            parse_harvester_results(json_path, domain, push)
-            print(f"[parse][job {job_id}] JSON parsing complete")
+        if not seen:
+            push("log", {"text": f"No results found. Check if domain '{domain}' exists."})
         else:
-            print(f"[parse][job {job_id}] No results file found. Checked: {json_path} and {output_file}")
-            push("log", {"text": f"No results file produced. Check if domain '{domain}' exists."})
+            counts = {kind: sum(1 for item_id in seen if item_id.startswith(kind + ":")) for kind in ("email", "host", "ip")}
+            push("log", {"text": f"Scan complete: {counts['email']} emails, {counts['host']} hosts, {counts['ip']} IPs from {len(sources)} sources"})
     
     except Exception as e:
         print(f"[ERROR][job {job_id}] {str(e)}")
         push("log", {"text": f"Error: {str(e)}"})
+        job.failed = True
     
     finally:
         # Cleanup temp directory
         try:
-            import shutil
-            shutil.rmtree(work_dir)
+            await engine.offload(shutil.rmtree, work_dir)
         except Exception as e:
             print(f"[cleanup][job {job_id}] {str(e)}")
         
         # Signal completion
         push("done", {})
-        job_buffer.put(None)  # Sentinel
+        job.finish()
 
 
 def find_harvester():
@@ -819,203 +1493,799 @@ def find_harvester():
         if os.path.exists(loc):
             return loc
     
-    # Try 'which theHarvester'
-    try:
-        result = subprocess.run(["which", "theHarvester"], capture_output=True, text=True)
-        if result.returncode == 0:
-            return result.stdout.strip()
-    except:
-        pass
-    
-    return None
+    return shutil.which("theHarvester")
 
 
-def parse_harvester_results(json_path, domain, push):
-    """Parse theHarvester JSON and send results"""
+def parse_harvester_results(json_path, domain, push, seen=None, label="Parsing"):
+    """Parse theHarvester JSON and send results whose ID is not already in `seen`"""
+    if seen is None:
+        seen = set()
+    counts = {"email": 0, "host": 0, "ip": 0}
+    
+    def send(kind, value):
+        item_id = f"{kind}:{value}"
+        if not value or item_id in seen:
+            return
+        seen.add(item_id)
+        counts[kind] += 1
+        item = {
+            "id": item_id,
+            "type": kind,
+            "value": value,
+            "domain": domain,
+        }
+        push("result", {"item": item})
+    
     try:
-        import json
         with open(json_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
-        # Track unique IPs
-        seen_ips = set()
-        
         # Extract emails
-        emails = data.get("emails", [])
-        for email in emails:
-            item = {
-                "id": f"email:{email}",
-                "type": "email",
-                "value": email,
-                "domain": domain,
-            }
-            push("result", {"item": item})
+        for email in data.get("emails", []):
+            send("email", email)
         
         # Extract hosts/subdomains
         # theHarvester may format as "host:ip" when DNS resolution is enabled
-        hosts = data.get("hosts", [])
-        for host_entry in hosts:
-            # Split host:ip format
-            if ':' in host_entry:
-                parts = host_entry.split(':', 1)
-                host = parts[0]
-                ip = parts[1] if len(parts) > 1 else None
-                
-                # Send host
-                item = {
-                    "id": f"host:{host}",
-                    "type": "host",
-                    "value": host,
-                    "domain": domain,
-                }
-                push("result", {"item": item})
-                
-                # Send IP if present and not seen
-                if ip and ip not in seen_ips:
-                    seen_ips.add(ip)
-                    item = {
-                        "id": f"ip:{ip}",
-                        "type": "ip",
-                        "value": ip,
-                        "domain": domain,
-                    }
-                    push("result", {"item": item})
-            else:
-                # Just a host without IP
-                item = {
-                    "id": f"host:{host_entry}",
-                    "type": "host",
-                    "value": host_entry,
-                    "domain": domain,
-                }
-                push("result", {"item": item})
+        for host_entry in data.get("hosts", []):
+            host, _, ip = host_entry.partition(':')
+            send("host", host)
+            send("ip", ip)
         
         # Extract IPs from dedicated ips array (if present)
-        ips = data.get("ips", [])
-        for ip in ips:
-            if ip not in seen_ips:
-                seen_ips.add(ip)
-                item = {
-                    "id": f"ip:{ip}",
-                    "type": "ip",
-                    "value": ip,
-                    "domain": domain,
-                }
-                push("result", {"item": item})
-        
-        push("log", {"text": f"Parsing complete: {len(emails)} emails, {len(hosts)} hosts, {len(seen_ips)} IPs"})
+        for ip in data.get("ips", []):
+            send("ip", ip)
+        
+        push("log", {"text": f"{label} complete: {counts['email']} new emails, {counts['host']} new hosts, {counts['ip']} new IPs"})
     
     except Exception as e:
         push("log", {"text": f"Error parsing JSON: {str(e)}"})
+    
+    return counts
 
 
-def extract_thumbnails(file_path, temp_dir):
-    """Extract thumbnail and preview images from file"""
-    thumbnails = []
-    try:
-        # Try to extract ThumbnailImage
-        thumb_path = os.path.join(temp_dir, "thumbnail.jpg")
-        result = subprocess.run(
-            ["exiftool", "-b", "-ThumbnailImage", file_path],
-            capture_output=True,
-            timeout=10
-        )
-        if result.returncode == 0 and len(result.stdout) > 0:
-            with open(thumb_path, 'wb') as f:
-                f.write(result.stdout)
-            # Convert to base64 for frontend
-            import base64
-            thumbnails.append({
-                "type": "Thumbnail",
-                "data": base64.b64encode(result.stdout).decode('utf-8')
-            })
-            print(f"[extract_thumbnails] Extracted thumbnail ({len(result.stdout)} bytes)")
-        
-        # Try to extract PreviewImage
-        preview_path = os.path.join(temp_dir, "preview.jpg")
-        result = subprocess.run(
-            ["exiftool", "-b", "-PreviewImage", file_path],
-            capture_output=True,
-            timeout=10
-        )
-        if result.returncode == 0 and len(result.stdout) > 0:
-            import base64
-            thumbnails.append({
-                "type": "Preview",
-                "data": base64.b64encode(result.stdout).decode('utf-8')
-            })
-            print(f"[extract_thumbnails] Extracted preview ({len(result.stdout)} bytes)")
-    except Exception as e:
-        print(f"[extract_thumbnails] error: {str(e)}")
-    
-    return thumbnails
+# ExifTool worker pool settings (override via environment)
+EXIFTOOL_BIN = os.environ.get("EXIFTOOL_BIN", "exiftool")
+EXIFTOOL_WORKERS = int(os.environ.get("CHAMELEON_EXIFTOOL_WORKERS", 4))
+EXIFTOOL_MAX_REQUESTS = 1000  # recycle workers periodically to bound Perl memory growth
+EXIFTOOL_PING_AFTER = 60  # seconds idle before a worker is pinged before reuse
 
 
-def generate_file_hashes(file_path):
-    """Generate MD5 and SHA256 hashes of the file"""
-    import hashlib
-    hashes = {}
-    try:
-        md5_hash = hashlib.md5()
-        sha256_hash = hashlib.sha256()
-        
-        with open(file_path, 'rb') as f:
-            # Read file in chunks for memory efficiency
-            for chunk in iter(lambda: f.read(4096), b""):
-                md5_hash.update(chunk)
-                sha256_hash.update(chunk)
-        
-        hashes['MD5'] = md5_hash.hexdigest()
-        hashes['SHA256'] = sha256_hash.hexdigest()
-        print(f"[generate_file_hashes] MD5={hashes['MD5']}, SHA256={hashes['SHA256'][:16]}...")
-    except Exception as e:
-        print(f"[generate_file_hashes] error: {str(e)}")
-    
-    return hashes
+class ExifToolError(Exception):
+    """Raised when an ExifTool worker dies or breaks protocol"""
 
 
-def verify_file_type(file_path, filename):
-    """Verify if file extension matches actual file type"""
-    verification = {
-        "extensionMatches": True,
-        "warning": None,
-        "declaredType": None,
-        "actualType": None
-    }
-    
-    try:
-        # Get file extension
-        ext = os.path.splitext(filename)[1].lower()
-        verification['declaredType'] = ext
+class ExifToolTimeout(subprocess.TimeoutExpired):
+    """Raised when an ExifTool request takes longer than its timeout"""
+
+
+class ExifToolProcess:
+    """One long-lived `exiftool -stay_open True -@ -` worker
+
+    Each request is written to stdin as one argument per line followed by
+    `-execute<N>`; ExifTool answers with the output followed by `{ready<N>}`
+    on stdout, and `-echo4` puts the same marker at the end of stderr.
+    Both pipes are drained by per-worker reader threads rather than
+    select(), which cannot wait on pipes on Windows.
+    """
+
+    def __init__(self, binary=EXIFTOOL_BIN):
+        self.requests = 0
+        self.last_used = time.time()
+        self._seq = itertools.count(1)
+        self.process = subprocess.Popen(
+            [binary, "-stay_open", "True", "-@", "-", "-common_args", "-charset", "filename=utf8"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        self._output = queue.Queue()  # (stream name, chunk); an empty chunk means the pipe closed
+        for name, stream in (("stdout", self.process.stdout), ("stderr", self.process.stderr)):
+            threading.Thread(target=self._pump, args=(name, stream), name=f"exiftool-{name}", daemon=True).start()
+
+    def _pump(self, name, stream):
+        while True:
+            try:
+                chunk = stream.read1(65536)
+            except (OSError, ValueError):
+                chunk = b""
+            self._output.put((name, chunk))
+            if not chunk:
+                return
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def run(self, args, timeout):
+        """Run one request; returns (stdout bytes, stderr bytes)"""
+        # The argument stream is line-based: a newline in a filename would smuggle in options such as -if
+        for arg in args:
+            if any(c in arg for c in "\r\n\0"):
+                raise ValueError(f"ExifTool argument contains a control character: {arg!r}")
+        if not self.alive():
+            raise ExifToolError(f"worker exited with code {self.process.returncode}")
+        
+        seq = next(self._seq)
+        marker = f"{{ready{seq}}}".encode()
+        command = "\n".join([*args, "-echo4", marker.decode(), f"-execute{seq}"]) + "\n"
+        try:
+            self.process.stdin.write(command.encode("utf-8"))
+            self.process.stdin.flush()
+        except OSError as e:
+            raise ExifToolError(f"worker stdin closed: {e}")
+        
+        # The reader threads drain both pipes, so neither can fill up and stall the worker
+        buffers = {"stdout": bytearray(), "stderr": bytearray()}
+        pending = set(buffers)
+        deadline = time.monotonic() + timeout
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise ExifToolTimeout(args, timeout)
+            try:
+                name, chunk = self._output.get(timeout=remaining)
+            except queue.Empty:
+                raise ExifToolTimeout(args, timeout)
+            if not chunk:
+                raise ExifToolError("worker closed its output")
+            buffer = buffers[name]
+            buffer += chunk
+            if buffer.rstrip().endswith(marker):
+                pending.discard(name)
+        
+        self.requests += 1
+        self.last_used = time.time()
+        stdout = bytes(buffers["stdout"])
+        stderr = bytes(buffers["stderr"])
+        return stdout[:stdout.rfind(marker)], stderr[:stderr.rfind(marker)]
+
+    def close(self):
+        """Ask the worker to exit, killing it if it doesn't"""
+        try:
+            self.process.stdin.write(b"-stay_open\nFalse\n")
+            self.process.stdin.flush()
+            self.process.wait(timeout=2)
+        except Exception:
+            self.process.kill()
+            self.process.wait()
+
+
+class ExifToolPool:
+    """Pool of persistent ExifTool workers with health checks and restart-on-crash"""
+
+    def __init__(self, size=EXIFTOOL_WORKERS, binary=EXIFTOOL_BIN):
+        self.size = size
+        self.binary = binary
+        self.started = 0
+        self.restarted = 0
+        self._created = 0
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def run(self, args, timeout=30, text=False):
+        """Run an ExifTool command on a pooled worker, like subprocess.run(capture_output=True)
+
+        The return code is 1 when ExifTool reported an error on stderr, 0 otherwise.
+        """
+        worker = self._acquire()
+        try:
+            try:
+                stdout, stderr = worker.run(args, timeout)
+            except ExifToolError:
+                # Worker crashed between requests or mid-request: retry once on a fresh one
+                worker = self._replace(worker)
+                stdout, stderr = worker.run(args, timeout)
+        except Exception:
+            self._discard(worker)
+            raise
         
-        # Get actual file type from exiftool
-        result = subprocess.run(
-            ["exiftool", "-FileType", "-MIMEType", "-s3", file_path],
-            capture_output=True,
-            text=True,
-            timeout=5
+        if worker.requests >= EXIFTOOL_MAX_REQUESTS:
+            self._discard(worker)
+        else:
+            self._idle.put(worker)
+        
+        returncode = 1 if re.search(rb"^Error", stderr, re.MULTILINE) else 0
+        if text:
+            stdout = stdout.decode("utf-8", errors="replace")
+            stderr = stderr.decode("utf-8", errors="replace")
+        return subprocess.CompletedProcess([self.binary, *args], returncode, stdout, stderr)
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "started": self.started,
+            "restarted": self.restarted,
+        }
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _acquire(self):
+        worker = None
+        while worker is None:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    spawn = self._created < self.size
+                    if spawn:
+                        self._created += 1
+                if spawn:
+                    try:
+                        return self._spawn()
+                    except Exception:
+                        with self._lock:
+                            self._created -= 1
+                        raise
+                # Pool exhausted: wait for a worker (re-checking capacity in case one was discarded)
+                try:
+                    worker = self._idle.get(timeout=0.5)
+                except queue.Empty:
+                    pass
+        
+        # Health check: dead workers are replaced, long-idle ones are pinged first
+        if not worker.alive():
+            return self._replace(worker)
+        if time.time() - worker.last_used > EXIFTOOL_PING_AFTER:
+            try:
+                worker.run(["-ver"], timeout=5)
+            except (ExifToolError, subprocess.TimeoutExpired):
+                return self._replace(worker)
+        return worker
+
+    def _spawn(self):
+        worker = ExifToolProcess(self.binary)
+        self.started += 1
+        return worker
+
+    def _replace(self, worker):
+        print("[exiftool] restarting worker")
+        worker.process.kill()
+        worker.process.wait()
+        self.restarted += 1
+        return self._spawn()
+
+    def _discard(self, worker):
+        worker.close()
+        with self._lock:
+            self._created -= 1
+
+
+exiftool = ExifToolPool()
+atexit.register(exiftool.close)
+
+
+INGEST_BUFFER_SIZE = 1024 * 1024  # file copy/digest buffer
+# Multipart read size; Werkzeug rejects a single chunk larger than max_form_memory_size (500 KB)
+MULTIPART_BUFFER_SIZE = 256 * 1024
+MAGIC_HEADER_BYTES = 64
+
+# Leading-byte signatures for sniffing the real file type, longest first where prefixes overlap
+MAGIC_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "ole2"),
+    (b"7z\xbc\xaf\x27\x1c", "7z"),
+    (b"Rar!\x1a\x07", "rar"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"%PDF-", "pdf"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"PK\x03\x04", "zip"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+    (b"\x7fELF", "elf"),
+    (b"OggS", "ogg"),
+    (b"fLaC", "flac"),
+    (b"8BPS", "psd"),
+    (b"ID3", "mp3"),
+    (b"\x1f\x8b", "gzip"),
+    (b"BM", "bmp"),
+    (b"MZ", "exe"),
+]
+RIFF_FORMATS = {b"WEBP": "webp", b"WAVE": "wav", b"AVI ": "avi"}
+FTYP_BRANDS = {b"qt  ": "mov", b"heic": "heic", b"heix": "heic", b"mif1": "heif", b"M4A ": "m4a", b"crx ": "cr3"}
+
+
+def sniff_magic(header):
+    """Identify a file type from its leading bytes, or None"""
+    if header[:4] == b"RIFF":
+        return RIFF_FORMATS.get(header[8:12], "riff")
+    if header[4:8] == b"ftyp":
+        return FTYP_BRANDS.get(header[8:12], "mp4")
+    for signature, file_type in MAGIC_SIGNATURES:
+        if header.startswith(signature):
+            return file_type
+    return None
+
+
+class UploadDigest:
+    """Running MD5/SHA-1/SHA-256, byte count and magic header of a byte stream"""
+
+    def __init__(self):
+        self.md5 = hashlib.md5()
+        self.sha1 = hashlib.sha1()
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.header = bytearray()
+
+    def update(self, data):
+        self.md5.update(data)
+        self.sha1.update(data)
+        self.sha256.update(data)
+        self.size += len(data)
+        if len(self.header) < MAGIC_HEADER_BYTES:
+            self.header += data[:MAGIC_HEADER_BYTES - len(self.header)]
+
+    def result(self):
+        return {
+            "hashes": {
+                "MD5": self.md5.hexdigest(),
+                "SHA1": self.sha1.hexdigest(),
+                "SHA256": self.sha256.hexdigest(),
+            },
+            "size": self.size,
+            "magic": sniff_magic(bytes(self.header)),
+        }
+
+
+class IngestFile:
+    """Upload spool that digests each chunk as Werkzeug writes it
+
+    Behaves as the FileStorage stream. claim() moves the spool file into
+    place instead of copying it; an unclaimed spool is deleted on close, or
+    when it is garbage collected if the upload was aborted and Werkzeug
+    never closed it.
+    """
+
+    def __init__(self):
+        self._file = tempfile.NamedTemporaryFile(prefix="chameleon-ingest-", delete=False)
+        self.path = self._file.name
+        self.digest = UploadDigest()
+        self._discard = weakref.finalize(self, IngestFile._remove, self._file, self.path)
+
+    @staticmethod
+    def _remove(file, path):
+        file.close()
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def write(self, data):
+        self.digest.update(data)
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def claim(self, dest):
+        """Move the spooled upload to dest and return its digest"""
+        self._file.close()
+        shutil.move(self.path, dest)
+        self._discard.detach()
+        self.path = None
+        return self.digest.result()
+
+    def close(self):
+        self._discard()
+        self.path = None
+
+
+class IngestFormDataParser(FormDataParser):
+    """Form parser reading multipart bodies in MULTIPART_BUFFER_SIZE chunks"""
+
+    def _parse_multipart(self, stream, mimetype, content_length, options):
+        parser = MultiPartParser(
+            stream_factory=self.stream_factory,
+            max_form_memory_size=self.max_form_memory_size,
+            max_form_parts=self.max_form_parts,
+            cls=self.cls,
+            buffer_size=MULTIPART_BUFFER_SIZE,
         )
+        boundary = options.get("boundary", "").encode("ascii")
+        if not boundary:
+            raise ValueError("Missing boundary")
+        form, files = parser.parse(stream, boundary, content_length)
+        return stream, form, files
+
+
+class IngestRequest(Request):
+    """Request whose file uploads are hashed and sniffed while they are received"""
+
+    form_data_parser_class = IngestFormDataParser
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return IngestFile()
+
+
+app.request_class = IngestRequest
+
+
+def upload_filename(file):
+    """Display name of an upload: its basename without control characters"""
+    name = os.path.basename((file.filename or "").replace("\\", "/"))
+    return re.sub(r"[\x00-\x1f\x7f]", "", name)
+
+
+def disk_filename(filename):
+    """ASCII-safe name to store a file under, keeping a plain extension for ExifTool's type hints"""
+    stem, ext = os.path.splitext(filename)
+    return (secure_filename(stem) or "upload") + (ext if re.fullmatch(r"\.[A-Za-z0-9]{1,16}", ext) else "")
+
+
+def ingest_upload(file, dest):
+    """Save an uploaded FileStorage to dest; returns {"hashes", "size", "magic"}"""
+    if isinstance(file.stream, IngestFile):
+        return file.stream.claim(dest)
+    digest = UploadDigest()
+    buffer = bytearray(INGEST_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(dest, "wb") as out:
+        while True:
+            n = file.stream.readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+            out.write(view[:n])
+    return digest.result()
+
+
+# One ExifTool pass per file: full grouped metadata with binary tags as base64
+EXIFTOOL_EXTRACT_ARGS = ["-json", "-a", "-G", "-b"]
+
+# Embedded images returned to the frontend, by ExifTool tag name
+EMBEDDED_IMAGE_TAGS = {"ThumbnailImage": "Thumbnail", "PreviewImage": "Preview"}
+
+
+def split_binary_tags(record):
+    """Split an ExifTool -b JSON record into metadata and base64 embedded images
+
+    Binary values are replaced by ExifTool's usual "(Binary data N bytes...)"
+    placeholder so the metadata stays compact.
+    """
+    metadata = {}
+    images = {}
+    for key, value in record.items():
+        if isinstance(value, str) and value.startswith("base64:"):
+            data = value[7:]
+            tag = key.rsplit(":", 1)[-1]
+            if tag in EMBEDDED_IMAGE_TAGS and data and tag not in images:
+                images[tag] = data
+            size = len(data) * 3 // 4 - data[-2:].count("=")
+            value = f"(Binary data {size} bytes, use -b option to extract)"
+        metadata[key] = value
+    return metadata, images
+
+
+def extract_thumbnails(images):
+    """Store base64 images found by split_binary_tags; returns their hashes and URLs"""
+    thumbnails = []
+    for tag, label in EMBEDDED_IMAGE_TAGS.items():
+        data = images.get(tag)
+        if data:
+            raw = base64.b64decode(data)
+            digest = hashlib.sha256(raw).hexdigest()
+            if not thumbnail_store.has(digest):
+                thumbnail_store.put(digest, raw)
+            thumbnails.append({
+                "type": label,
+                "hash": digest,
+                "url": f"/exiftool/thumbnails/{digest}",
+                "size": len(raw)
+            })
+            print(f"[extract_thumbnails] Extracted {label.lower()} ({len(raw)} bytes)")
+    return thumbnails
+
+
+# Upload-once artifact store (override via environment); lives beside the ingest spool so files are renamed, not copied.
+# Each backend process keeps its artifacts in its own private directory under ARTIFACT_DIR.
+ARTIFACT_DIR = os.environ.get("CHAMELEON_ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "chameleon-artifacts"))
+ARTIFACT_TTL = int(os.environ.get("CHAMELEON_ARTIFACT_TTL", 3600))
+ARTIFACT_MAX_BYTES = int(os.environ.get("CHAMELEON_ARTIFACT_MAX_MB", 2048)) * 1024 * 1024
+
+
+class ArtifactStore:
+    """Uploaded files kept on disk under their SHA-256 handle with TTL and LRU size eviction
+
+    Clients upload once and pass the returned handle to later hex-dump,
+    analyze and remove-metadata calls. The store is scratch space: a
+    private directory under `parent`, removed when the process exits.
+    
+    store() and get() pin the artifact they return until release() is
+    called. Evicting a pinned artifact drops it from the index right away
+    but leaves its file on disk until the last user releases it.
+    """
+
+    def __init__(self, parent, ttl=ARTIFACT_TTL, max_bytes=ARTIFACT_MAX_BYTES):
+        os.makedirs(parent, exist_ok=True)
+        self.root = tempfile.mkdtemp(prefix="store-", dir=parent)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evicted = 0
+        self._items = OrderedDict()  # handle -> artifact dict, least recently used first
+        self._retired = {}  # handle -> evicted artifact still pinned by a request
+        self._lock = threading.Lock()
+        atexit.register(shutil.rmtree, self.root, ignore_errors=True)
+
+    def store(self, file):
+        """Ingest an uploaded FileStorage and return its artifact, pinned"""
+        filename = upload_filename(file)
+        incoming = tempfile.mkdtemp(prefix="incoming-", dir=self.root)
+        try:
+            path = os.path.join(incoming, disk_filename(filename))
+            ingest = ingest_upload(file, path)
+            return self._add(path, filename, ingest)
+        finally:
+            shutil.rmtree(incoming, ignore_errors=True)
+
+    def get(self, handle):
+        """Return the artifact for a handle, pinned, or None if unknown or expired"""
+        with self._lock:
+            self._evict_expired()
+            artifact = self._items.get(handle)
+            if artifact is None:
+                return None
+            artifact["used"] = time.time()
+            artifact["pins"] += 1
+            self._items.move_to_end(handle)
+            return artifact
+
+    def release(self, artifact):
+        """Unpin an artifact from store() or get(), deleting it if it was evicted meanwhile"""
+        with self._lock:
+            artifact["pins"] -= 1
+            if artifact["pins"] == 0 and self._retired.get(artifact["handle"]) is artifact:
+                del self._retired[artifact["handle"]]
+                self._delete(artifact)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "bytes": self.bytes,
+                "evicted": self.evicted,
+                "pinned": sum(1 for artifact in self._items.values() if artifact["pins"]),
+                "retiredPinned": len(self._retired),
+            }
+
+    def _add(self, path, filename, ingest):
+        handle = ingest["hashes"]["SHA256"]
+        with self._lock:
+            self._evict_expired()
+            artifact = self._items.get(handle)
+            if artifact is None and handle in self._retired:
+                # Evicted but still in use: its file is intact, so bring it back
+                artifact = self._retired.pop(handle)
+                self._items[handle] = artifact
+                self.bytes += artifact["size"]
+            if artifact is not None:
+                # Same content uploaded again: keep the stored copy; the new name is the caller's to use
+                artifact["used"] = time.time()
+                artifact["pins"] += 1
+                self._items.move_to_end(handle)
+                self._evict_lru()
+                return artifact
+            artifact_dir = os.path.join(self.root, handle)
+            os.makedirs(artifact_dir, exist_ok=True)
+            stored_path = os.path.join(artifact_dir, os.path.basename(path))
+            os.replace(path, stored_path)
+            now = time.time()
+            artifact = {
+                "handle": handle,
+                "path": stored_path,
+                "filename": filename,
+                "size": ingest["size"],
+                "hashes": ingest["hashes"],
+                "magic": ingest["magic"],
+                "stored": now,
+                "used": now,
+                "pins": 1,
+            }
+            self._items[handle] = artifact
+            self.bytes += artifact["size"]
+            self._evict_lru()
+            return artifact
+
+    def _remove(self, handle):
+        artifact = self._items.pop(handle)
+        self.bytes -= artifact["size"]
+        self.evicted += 1
+        if artifact["pins"]:
+            self._retired[handle] = artifact
+        else:
+            self._delete(artifact)
+        print(f"[artifacts] evicted {handle[:16]}... ({artifact['filename']})")
+
+    @staticmethod
+    def _delete(artifact):
+        shutil.rmtree(os.path.dirname(artifact["path"]), ignore_errors=True)
+
+    def _evict_expired(self):
+        cutoff = time.time() - self.ttl
+        while self._items:
+            handle, artifact = next(iter(self._items.items()))
+            if artifact["used"] >= cutoff:
+                break
+            self._remove(handle)
+
+    def _evict_lru(self):
+        # Never evict the newest artifact, even if it alone exceeds the budget
+        while self.bytes > self.max_bytes and len(self._items) > 1:
+            self._remove(next(iter(self._items)))
+
+
+artifacts = ArtifactStore(ARTIFACT_DIR)
+
+
+def artifact_info(artifact):
+    """Public description of a stored artifact"""
+    return {
+        "handle": artifact["handle"],
+        "filename": artifact["filename"],
+        "size": artifact["size"],
+        "hashes": artifact["hashes"],
+        "magic": artifact["magic"],
+        "expiresIn": ARTIFACT_TTL,
+    }
+
+
+def release_after_response(artifact):
+    """Keep an artifact pinned until the current response, streamed body included, has been sent"""
+    @after_this_request
+    def release(response):
+        response.call_on_close(lambda: artifacts.release(artifact))
+        return response
+
+
+def receive_artifact():
+    """Resolve the request's `handle`, or store its uploaded `file`; returns (artifact, error_response)
+
+    The artifact stays pinned for the rest of the request. The caller gets
+    its own copy, whose `filename` is the name this request uploaded.
+    """
+    handle = request.values.get("handle")
+    if handle:
+        artifact = artifacts.get(handle)
+        if artifact is None:
+            return None, (jsonify({"error": "Unknown or expired handle; upload the file again"}), 404)
+        release_after_response(artifact)
+        return dict(artifact), None
+    
+    if 'file' not in request.files:
+        return None, (jsonify({"error": "No file provided"}), 400)
+    
+    file = request.files['file']
+    
+    if file.filename == '':
+        return None, (jsonify({"error": "No file selected"}), 400)
+    
+    artifact = artifacts.store(file)
+    release_after_response(artifact)
+    return dict(artifact, filename=upload_filename(file)), None
+
+
+def build_file_report(record, file_path, filename, ingest=None):
+    """Assemble the full analysis of one file from its single ExifTool JSON record"""
+    metadata_dict, images = split_binary_tags(record)
+    # Files are stored under a sanitised name; report the name the user uploaded
+    if "File:FileName" in metadata_dict:
+        metadata_dict["File:FileName"] = filename
+    ingest = ingest or digest_file(file_path)
+    report = {
+        "success": True,
+        "filename": filename,
+        "metadata": metadata_dict,
+        "thumbnails": extract_thumbnails(images),
+        "hashes": ingest["hashes"],
+        "fileVerification": verify_file_type(metadata_dict, filename, ingest["magic"]),
+        "gpsData": extract_gps_data(metadata_dict),
+        "timestampAnalysis": analyze_timestamps(metadata_dict),
+        "deviceInfo": extract_device_info(metadata_dict),
+        "fileStats": get_file_stats(file_path)
+    }
+    if report["hashes"].get("SHA256"):
+        analysis_cache.put(report["hashes"]["SHA256"], report)
+    return report
+
+
+def file_system_tags(file_path, filename):
+    """The tags ExifTool derives from the file on disk rather than its content, in ExifTool's format"""
+    st = os.stat(file_path)
+    
+    def exif_date(timestamp):
+        date = datetime.fromtimestamp(timestamp).astimezone().strftime("%Y:%m:%d %H:%M:%S%z")
+        return date[:-2] + ":" + date[-2:]
+    
+    return {
+        "SourceFile": file_path,
+        "File:FileName": filename,
+        "File:Directory": os.path.dirname(file_path),
+        "File:FileModifyDate": exif_date(st.st_mtime),
+        "File:FileAccessDate": exif_date(st.st_atime),
+        "File:FileInodeChangeDate": exif_date(st.st_ctime),
+        "File:FileCreateDate": exif_date(getattr(st, "st_birthtime", st.st_ctime)),
+        "File:FilePermissions": filemode(st.st_mode),
+    }
+
+
+def cached_file_report(file_path, filename, ingest):
+    """Return the cached analysis for this content, re-labelled for the new upload, or None"""
+    sha256 = ingest["hashes"]["SHA256"]
+    report = analysis_cache.get(sha256)
+    if report is None:
+        return None
+    # The report links to stored thumbnails; re-extract if any has been evicted
+    if not all("hash" in thumb and thumbnail_store.has(thumb["hash"]) for thumb in report["thumbnails"]):
+        return None
+    # Tags describing the file on disk belong to this particular upload, as do the timestamps read from them
+    metadata = report["metadata"]
+    for tag, value in file_system_tags(file_path, filename).items():
+        if tag in metadata:
+            metadata[tag] = value
+    report["timestampAnalysis"] = analyze_timestamps(metadata)
+    report["filename"] = filename
+    report["hashes"] = ingest["hashes"]
+    report["fileVerification"] = verify_file_type(report["metadata"], filename, ingest["magic"])
+    report["fileStats"] = get_file_stats(file_path)
+    report["cached"] = True
+    print(f"[cached_file_report] cache hit for {filename} ({sha256[:16]}...)")
+    return report
+
+
+def digest_file(file_path):
+    """Hash and sniff a file already on disk (uploads are digested on ingest instead)"""
+    digest = UploadDigest()
+    buffer = bytearray(INGEST_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(file_path, 'rb') as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.result()
+
+
+def verify_file_type(metadata, filename, magic=None):
+    """Verify if file extension matches the actual file type ExifTool (or the magic bytes) detected"""
+    verification = {
+        "extensionMatches": True,
+        "warning": None,
+        "declaredType": None,
+        "actualType": None,
+        "magicType": magic
+    }
+    
+    try:
+        # Get file extension
+        ext = os.path.splitext(filename)[1].lower()
+        verification['declaredType'] = ext
         
-        if result.returncode == 0:
-            lines = result.stdout.strip().split('\n')
-            if len(lines) >= 1:
-                actual_type = lines[0].strip().lower()
-                verification['actualType'] = actual_type
-                
-                # Check if extension matches file type
-                common_mappings = {
-                    '.jpg': 'jpeg', '.jpeg': 'jpeg', '.png': 'png', '.gif': 'gif',
-                    '.bmp': 'bmp', '.tiff': 'tiff', '.tif': 'tiff',
-                    '.pdf': 'pdf', '.doc': 'doc', '.docx': 'docx',
-                    '.mp4': 'mp4', '.mov': 'mov', '.avi': 'avi',
-                    '.mp3': 'mp3', '.wav': 'wav', '.m4a': 'm4a'
-                }
-                
-                expected_type = common_mappings.get(ext)
-                if expected_type and expected_type != actual_type:
-                    verification['extensionMatches'] = False
-                    verification['warning'] = f"File extension '{ext}' does not match actual file type '{actual_type}'. This could indicate file spoofing or renaming."
-                    print(f"[verify_file_type] WARNING: Extension mismatch - declared: {ext}, actual: {actual_type}")
+        # Get actual file type from the exiftool metadata, falling back to the sniffed magic bytes
+        file_type = metadata.get('File:FileType') or magic
+        if file_type:
+            actual_type = str(file_type).strip().lower()
+            verification['actualType'] = actual_type
+            
+            # Check if extension matches file type
+            common_mappings = {
+                '.jpg': 'jpeg', '.jpeg': 'jpeg', '.png': 'png', '.gif': 'gif',
+                '.bmp': 'bmp', '.tiff': 'tiff', '.tif': 'tiff',
+                '.pdf': 'pdf', '.doc': 'doc', '.docx': 'docx',
+                '.mp4': 'mp4', '.mov': 'mov', '.avi': 'avi',
+                '.mp3': 'mp3', '.wav': 'wav', '.m4a': 'm4a'
+            }
+            
+            expected_type = common_mappings.get(ext)
+            if expected_type and expected_type != actual_type:
+                verification['extensionMatches'] = False
+                verification['warning'] = f"File extension '{ext}' does not match actual file type '{actual_type}'. This could indicate file spoofing or renaming."
+                print(f"[verify_file_type] WARNING: Extension mismatch - declared: {ext}, actual: {actual_type}")
     
     except Exception as e:
         print(f"[verify_file_type] error: {str(e)}")
@@ -1160,37 +2430,105 @@ def format_bytes(size):
     return f"{size:.2f} TB"
 
 
+@app.route("/exiftool/status", methods=["GET"])
+def exiftool_status():
+    """Report ExifTool worker pool, analysis cache, thumbnail and artifact store counters"""
+    return jsonify({
+        **exiftool.stats(),
+        "analysisCache": analysis_cache.stats(),
+        "thumbnails": thumbnail_store.stats(),
+        "artifacts": artifacts.stats()
+    })
+
+
+def downscale_image(data, size):
+    """JPEG copy of an image scaled so its longest edge is at most size pixels"""
+    with Image.open(io.BytesIO(data)) as image:
+        image.thumbnail((size, size))
+        output = io.BytesIO()
+        image.convert("RGB").save(output, format="JPEG", quality=85)
+        return output.getvalue()
+
+
+@app.route("/exiftool/thumbnails/<digest>", methods=["GET"])
+def get_thumbnail(digest):
+    """Serve a stored thumbnail/preview by SHA-256; `?size=N` returns a downscaled JPEG
+
+    Content never changes for a given URL, so responses carry a strong ETag
+    and an immutable Cache-Control. Without Pillow the original is served.
+    """
+    size = request.args.get("size", type=int)
+    key = digest
+    if size and Image is not None:
+        # Snap to a fixed set of variants so arbitrary sizes cannot fill the store
+        size = next((s for s in THUMBNAIL_SIZES if s >= size), THUMBNAIL_SIZES[-1])
+        key = f"{digest}-{size}"
+    
+    etag = f'"{key}"'
+    if etag in request.headers.get("If-None-Match", ""):
+        return Response(status=304, headers={"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"})
+    
+    data = thumbnail_store.get(key)
+    if data is None and key != digest:
+        original = thumbnail_store.get(digest)
+        if original is not None:
+            try:
+                data = downscale_image(original, size)
+                thumbnail_store.put(key, data)
+            except Exception as e:
+                print(f"[GET /exiftool/thumbnails] downscale failed for {digest[:16]}...: {str(e)}")
+                key, etag, data = digest, f'"{digest}"', original
+    
+    if data is None:
+        return jsonify({"error": "Thumbnail not found"}), 404
+    
+    file_type = sniff_magic(data[:MAGIC_HEADER_BYTES]) or "jpeg"
+    return Response(
+        data,
+        mimetype=f"image/{file_type}",
+        headers={"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    )
+
+
+@app.route("/exiftool/upload", methods=["POST"])
+def upload_artifact():
+    """Store an upload once and return a handle for later hex-dump/analyze/remove-metadata calls"""
+    try:
+        artifact, error = receive_artifact()
+        if error:
+            return error
+        print(f"[POST /exiftool/upload] stored {artifact['filename']} as {artifact['handle'][:16]}...")
+        return jsonify({"success": True, **artifact_info(artifact)})
+    except Exception as e:
+        print(f"[POST /exiftool/upload] error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/exiftool/analyze", methods=["POST"])
 def analyze_file():
-    """Analyze file metadata using ExifTool with comprehensive features"""
+    """Analyze file metadata using ExifTool with comprehensive features
+
+    Accepts an uploaded `file` or the `handle` of a stored upload.
+    """
     print("[POST /exiftool/analyze] received file upload request")
     
-    # Check if file is present
-    if 'file' not in request.files:
-        print("[POST /exiftool/analyze] no file in request -> 400")
-        return jsonify({"error": "No file provided"}), 400
-    
-    file = request.files['file']
-    
-    # Check if filename is empty
-    if file.filename == '':
-        print("[POST /exiftool/analyze] empty filename -> 400")
-        return jsonify({"error": "No file selected"}), 400
-    
-    # Create temporary file
-    temp_dir = tempfile.mkdtemp(prefix="exiftool-")
-    
     try:
-        # Save uploaded file
-        safe_filename = os.path.basename(file.filename)
-        temp_path = os.path.join(temp_dir, safe_filename)
-        file.save(temp_path)
-        print(f"[POST /exiftool/analyze] saved file to {temp_path}")
-        
-        # 1. Extract basic metadata
-        result = subprocess.run(
-            ["exiftool", "-json", "-a", "-G", temp_path],
-            capture_output=True,
+        artifact, error = receive_artifact()
+        if error:
+            return error
+        
+        temp_path = artifact["path"]
+        safe_filename = artifact["filename"]
+        print(f"[POST /exiftool/analyze] using {temp_path} ({artifact['size']} bytes, magic={artifact['magic']})")
+        
+        # Identical content was analyzed before: skip ExifTool entirely
+        report = cached_file_report(temp_path, safe_filename, artifact)
+        if report is not None:
+            return jsonify({**report, "handle": artifact["handle"]})
+        
+        # Extract metadata, embedded images and file type in one ExifTool pass
+        result = exiftool.run(
+            EXIFTOOL_EXTRACT_ARGS + [temp_path],
             text=True,
             timeout=30
         )
@@ -1199,45 +2537,12 @@ def analyze_file():
             print(f"[POST /exiftool/analyze] exiftool error: {result.stderr}")
             return jsonify({"error": f"ExifTool error: {result.stderr}"}), 500
         
-        import json
         metadata = json.loads(result.stdout)
-        metadata_dict = metadata[0] if metadata else {}
-        
-        # 2. Extract thumbnails
-        thumbnails = extract_thumbnails(temp_path, temp_dir)
-        
-        # 3. Generate file hashes
-        hashes = generate_file_hashes(temp_path)
-        
-        # 4. Verify file type
-        file_verification = verify_file_type(temp_path, safe_filename)
-        
-        # 5. Analyze GPS data
-        gps_data = extract_gps_data(metadata_dict)
-        
-        # 6. Analyze timestamps
-        timestamp_analysis = analyze_timestamps(metadata_dict)
+        report = build_file_report(metadata[0] if metadata else {}, temp_path, safe_filename, artifact)
         
-        # 7. Extract device info
-        device_info = extract_device_info(metadata_dict)
+        print(f"[POST /exiftool/analyze] extracted {len(report['metadata'])} metadata fields")
         
-        # 8. Get file stats
-        file_stats = get_file_stats(temp_path)
-        
-        print(f"[POST /exiftool/analyze] extracted {len(metadata_dict)} metadata fields")
-        
-        return jsonify({
-            "success": True,
-            "filename": safe_filename,
-            "metadata": metadata_dict,
-            "thumbnails": thumbnails,
-            "hashes": hashes,
-            "fileVerification": file_verification,
-            "gpsData": gps_data,
-            "timestampAnalysis": timestamp_analysis,
-            "deviceInfo": device_info,
-            "fileStats": file_stats
-        })
+        return jsonify({**report, "handle": artifact["handle"]})
     
     except subprocess.TimeoutExpired:
         print("[POST /exiftool/analyze] timeout")
@@ -1246,92 +2551,208 @@ def analyze_file():
     except Exception as e:
         print(f"[POST /exiftool/analyze] error: {str(e)}")
         return jsonify({"error": str(e)}), 500
+
+
+# Batch analysis settings (override via environment)
+BATCH_MAX_FILES = int(os.environ.get("CHAMELEON_BATCH_MAX_FILES", 500))
+EXIFTOOL_BATCH_CHUNK = 25  # files per multi-file ExifTool request
+ANALYSIS_WORKERS = int(os.environ.get("CHAMELEON_ANALYSIS_WORKERS", min(32, (os.cpu_count() or 1) + 4)))
+
+# Shared pool for ExifTool requests, hashing and per-file post-processing
+analysis_pool = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix="analysis")
+
+
+def extract_records(paths):
+    """Run one multi-file ExifTool request; returns {path: JSON record or error message}"""
+    result = exiftool.run(
+        EXIFTOOL_EXTRACT_ARGS + paths,
+        text=True,
+        timeout=30 + 5 * len(paths)
+    )
+    records = {}
+    if result.stdout.strip():
+        for record in json.loads(result.stdout):
+            records[record.get("SourceFile")] = record
     
-    finally:
-        # Cleanup temp directory
+    outcome = {}
+    for path in paths:
+        if path in records:
+            outcome[path] = records[path]
+        else:
+            errors = [line for line in result.stderr.splitlines() if path in line]
+            outcome[path] = f"ExifTool error: {' '.join(errors) or result.stderr.strip() or 'no metadata returned'}"
+    return outcome
+
+
+def extract_chunk(paths):
+    """Extract a chunk of files, falling back to one request per file if the chunk fails"""
+    try:
+        return extract_records(paths)
+    except Exception as e:
+        print(f"[batch] chunk of {len(paths)} failed ({str(e)}), retrying per file")
+    outcome = {}
+    for path in paths:
         try:
-            import shutil
-            shutil.rmtree(temp_dir)
+            outcome.update(extract_records([path]))
+        except subprocess.TimeoutExpired:
+            outcome[path] = "Processing timeout"
         except Exception as e:
-            print(f"[cleanup] {str(e)}")
+            outcome[path] = str(e)
+    return outcome
+
+
+def iter_batch_reports(entries):
+    """Analyze saved uploads in parallel, yielding (index, result) as each file completes
+
+    entries is a list of (filename, path, ingest) triples. Files whose content
+    was analyzed before are answered from the analysis cache; the rest go to
+    ExifTool in multi-file chunks spread over the worker pool, then the
+    per-file post-processing runs concurrently. Both stages share one wait
+    loop, so a report is yielded as soon as it is built, and each future is
+    dropped once consumed. Errors are isolated per file.
+    """
+    misses = []
+    for index, (filename, path, ingest) in enumerate(entries):
+        report = cached_file_report(path, filename, ingest)
+        if report is not None:
+            yield index, report
+        else:
+            misses.append(index)
+    if not misses:
+        return
+    
+    chunk_size = max(1, min(EXIFTOOL_BATCH_CHUNK, -(-len(misses) // exiftool.size)))
+    chunks = [misses[i:i + chunk_size] for i in range(0, len(misses), chunk_size)]
+    extracting = {
+        analysis_pool.submit(extract_chunk, [entries[i][1] for i in chunk]): chunk
+        for chunk in chunks
+    }
+    building = {}
+    
+    while extracting or building:
+        done, _ = wait([*extracting, *building], return_when=FIRST_COMPLETED)
+        for future in done:
+            if future in extracting:
+                outcome = future.result()
+                for index in extracting.pop(future):
+                    filename, path, ingest = entries[index]
+                    record = outcome[path]
+                    if isinstance(record, dict):
+                        building[analysis_pool.submit(build_file_report, record, path, filename, ingest)] = index
+                    else:
+                        yield index, {"filename": filename, "error": record, "success": False}
+                continue
+            index = building.pop(future)
+            try:
+                yield index, future.result()
+            except Exception as e:
+                yield index, {"filename": entries[index][0], "error": str(e), "success": False}
+
+
+def save_batch_uploads(files, temp_dir):
+    """Save uploads into per-file directories; returns (entries, positions, errors)
+
+    entries are (filename, path, ingest) triples for iter_batch_reports, positions maps
+    each entry back to its upload index, and errors maps upload index to the
+    result of a file that could not be saved. Separate directories keep
+    duplicate filenames from colliding.
+    """
+    entries = []
+    positions = []
+    errors = {}
+    for index, file in enumerate(files):
+        safe_filename = upload_filename(file)
+        try:
+            file_dir = os.path.join(temp_dir, str(index))
+            os.mkdir(file_dir)
+            temp_path = os.path.join(file_dir, disk_filename(safe_filename))
+            entries.append((safe_filename, temp_path, ingest_upload(file, temp_path)))
+            positions.append(index)
+        except Exception as e:
+            errors[index] = {"filename": file.filename, "error": str(e), "success": False}
+    return entries, positions, errors
+
+
+def iter_batch_results(saved):
+    """Yield (upload index, result) for every saved upload as soon as it is analyzed"""
+    entries, positions, errors = saved
+    yield from errors.items()
+    for entry_index, report in iter_batch_reports(entries):
+        yield positions[entry_index], report
 
 
 @app.route("/exiftool/batch-analyze", methods=["POST"])
 def batch_analyze_files():
-    """Analyze multiple files at once"""
+    """Analyze multiple files at once
+
+    `?stream=ndjson` streams one JSON line per file as it completes and
+    `?stream=sse` returns a jobId whose /stream/<job_id> carries one
+    `result` event per file, its item tagged with the upload `index`;
+    otherwise a single JSON body is returned.
+    """
     print("[POST /exiftool/batch-analyze] received batch upload request")
     
     # Get all uploaded files
-    files = request.files.getlist('files')
+    files = [file for file in request.files.getlist('files') if file.filename != '']
+    stream_mode = request.args.get("stream", "")
     
-    if not files or len(files) == 0:
+    if not files:
         return jsonify({"error": "No files provided"}), 400
     
-    if len(files) > 20:
-        return jsonify({"error": "Maximum 20 files allowed"}), 400
+    if len(files) > BATCH_MAX_FILES:
+        return jsonify({"error": f"Maximum {BATCH_MAX_FILES} files allowed"}), 400
+    
+    if stream_mode not in ("", "ndjson", "sse"):
+        return jsonify({"error": "stream must be 'ndjson' or 'sse'"}), 400
+    
+    if stream_mode == "sse":
+        try:
+            job = jobs.create()
+        except RegistryFull as e:
+            return busy_response(e)
     
-    results = []
+    # Save the uploads now: the request body is gone once a streamed response starts
     temp_dir = tempfile.mkdtemp(prefix="exiftool-batch-")
+    saved = save_batch_uploads(files, temp_dir)
     
-    try:
-        for file in files:
-            if file.filename == '':
-                continue
-            
+    if stream_mode == "ndjson":
+        def ndjson_stream():
             try:
-                # Save uploaded file
-                safe_filename = os.path.basename(file.filename)
-                temp_path = os.path.join(temp_dir, safe_filename)
-                file.save(temp_path)
-                
-                # Extract basic metadata
-                result = subprocess.run(
-                    ["exiftool", "-json", "-a", "-G", temp_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
-                
-                if result.returncode != 0:
-                    results.append({
-                        "filename": safe_filename,
-                        "error": f"ExifTool error: {result.stderr}",
-                        "success": False
-                    })
-                    continue
-                
-                import json
-                metadata = json.loads(result.stdout)
-                metadata_dict = metadata[0] if metadata else {}
-                
-                # Extract all features for each file
-                thumbnails = extract_thumbnails(temp_path, temp_dir)
-                hashes = generate_file_hashes(temp_path)
-                file_verification = verify_file_type(temp_path, safe_filename)
-                gps_data = extract_gps_data(metadata_dict)
-                timestamp_analysis = analyze_timestamps(metadata_dict)
-                device_info = extract_device_info(metadata_dict)
-                file_stats = get_file_stats(temp_path)
-                
-                results.append({
-                    "success": True,
-                    "filename": safe_filename,
-                    "metadata": metadata_dict,
-                    "thumbnails": thumbnails,
-                    "hashes": hashes,
-                    "fileVerification": file_verification,
-                    "gpsData": gps_data,
-                    "timestampAnalysis": timestamp_analysis,
-                    "deviceInfo": device_info,
-                    "fileStats": file_stats
-                })
-                
+                for index, result in iter_batch_results(saved):
+                    yield json.dumps({"index": index, **result}) + "\n"
+            except Exception as e:
+                print(f"[POST /exiftool/batch-analyze] error: {str(e)}")
+                yield json.dumps({"error": str(e), "success": False}) + "\n"
+            finally:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+        
+        return Response(ndjson_stream(), mimetype="application/x-ndjson")
+    
+    if stream_mode == "sse":
+        def run_batch_job():
+            try:
+                job.push("log", {"text": f"Analyzing {len(files)} files"})
+                for index, result in iter_batch_results(saved):
+                    job.push("result", {"item": {"index": index, **result}})
             except Exception as e:
-                results.append({
-                    "filename": file.filename,
-                    "error": str(e),
-                    "success": False
-                })
+                print(f"[ERROR][job {job.id}] {str(e)}")
+                job.push("log", {"text": f"Error: {str(e)}"})
+                job.failed = True
+            finally:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                job.push("done")
+                job.finish()
+        
+        threading.Thread(target=run_batch_job, daemon=True).start()
+        print(f"[POST /exiftool/batch-analyze] respond -> {{ jobId: \"{job.id}\" }}")
+        return jsonify({"jobId": job.id, "count": len(files)})
+    
+    try:
+        results = [None] * len(files)
+        for index, result in iter_batch_results(saved):
+            results[index] = result
+        
+        print(f"[POST /exiftool/batch-analyze] analyzed {len(results)} files")
         
         return jsonify({
             "success": True,
@@ -1345,220 +2766,893 @@ def batch_analyze_files():
     
     finally:
         try:
-            import shutil
             shutil.rmtree(temp_dir)
         except Exception as e:
             print(f"[cleanup] {str(e)}")
 
 
+# Hex viewer limits (override via environment)
+HEX_MAX_WINDOW = int(os.environ.get("CHAMELEON_HEX_MAX_KB", 512)) * 1024
+HEX_SEARCH_MAX_RESULTS = 10000
+HEX_LINE_BYTES = 16
+
+# Printable ASCII maps to itself, everything else to '.'
+HEX_ASCII_TABLE = bytes(b if 32 <= b < 127 else ord('.') for b in range(256))
+
+
+@contextlib.contextmanager
+def mapped_file(path):
+    """Read-only memory map of a file; empty files map to b''"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def format_hex_lines(data, offset):
+    """Format a window as 16-byte hex dump lines using whole-window hex/translate passes"""
+    hex_all = data.hex(' ')
+    ascii_all = data.translate(HEX_ASCII_TABLE).decode('ascii')
+    hex_width = HEX_LINE_BYTES * 3
+    return [
+        {
+            "address": f"{offset + i:08x}",
+            "hex": hex_all[i * 3:i * 3 + hex_width - 1],
+            "ascii": ascii_all[i:i + HEX_LINE_BYTES]
+        }
+        for i in range(0, len(data), HEX_LINE_BYTES)
+    ]
+
+
 @app.route("/exiftool/hex-dump", methods=["POST"])
 def get_hex_dump():
-    """Get hex dump of file for binary analysis"""
+    """Get hex dump of file for binary analysis
+
+    Accepts an uploaded `file` or the `handle` returned by an earlier call,
+    so paging through a large file uploads it only once. The window is read
+    through a memory map, up to CHAMELEON_HEX_MAX_KB per request.
+    """
     print("[POST /exiftool/hex-dump] received request")
     
-    if 'file' not in request.files:
-        return jsonify({"error": "No file provided"}), 400
-    
-    file = request.files['file']
-    
-    if file.filename == '':
-        return jsonify({"error": "No file selected"}), 400
-    
     # Get optional parameters
-    offset = int(request.form.get('offset', 0))
-    length = int(request.form.get('length', 1024))  # Default 1KB
-    
-    # Limit maximum length to 10KB to avoid performance issues
-    length = min(length, 10240)
+    try:
+        offset = max(0, int(request.values.get('offset', 0)))
+        length = max(0, int(request.values.get('length', 1024)))  # Default 1KB
+    except ValueError:
+        return jsonify({"error": "offset and length must be integers"}), 400
     
-    temp_dir = tempfile.mkdtemp(prefix="exiftool-hex-")
+    length = min(length, HEX_MAX_WINDOW)
     
     try:
-        # Save uploaded file
-        safe_filename = os.path.basename(file.filename)
-        temp_path = os.path.join(temp_dir, safe_filename)
-        file.save(temp_path)
-        
-        # Get file size
-        file_size = os.path.getsize(temp_path)
-        
-        # Read binary data
-        with open(temp_path, 'rb') as f:
-            f.seek(offset)
-            data = f.read(length)
-        
-        # Convert to hex dump format
-        hex_lines = []
-        for i in range(0, len(data), 16):
-            chunk = data[i:i+16]
-            hex_part = ' '.join(f'{b:02x}' for b in chunk)
-            ascii_part = ''.join(chr(b) if 32 <= b < 127 else '.' for b in chunk)
-            address = offset + i
-            hex_lines.append({
-                "address": f"{address:08x}",
-                "hex": hex_part,
-                "ascii": ascii_part
-            })
+        artifact, error = receive_artifact()
+        if error:
+            return error
+        
+        with mapped_file(artifact["path"]) as mm:
+            data = bytes(mm[offset:offset + length])
         
         return jsonify({
             "success": True,
-            "filename": safe_filename,
-            "fileSize": file_size,
+            "handle": artifact["handle"],
+            "filename": artifact["filename"],
+            "fileSize": artifact["size"],
             "offset": offset,
             "length": len(data),
-            "hexDump": hex_lines
+            "hexDump": format_hex_lines(data, offset)
         })
     
     except Exception as e:
         print(f"[POST /exiftool/hex-dump] error: {str(e)}")
         return jsonify({"error": str(e)}), 500
+
+
+@app.route("/exiftool/hex-search", methods=["POST"])
+def search_hex():
+    """Find every offset of a byte pattern in a file
+
+    `pattern` is hex (`encoding=hex`, e.g. "ff d8 ff") or literal text
+    (`encoding=ascii`, the default). Matches may overlap; the search runs
+    over a memory map so multi-GB files are never loaded into RAM.
+    """
+    print("[POST /exiftool/hex-search] received request")
+    
+    pattern = request.values.get('pattern', '')
+    encoding = request.values.get('encoding', 'ascii')
+    try:
+        start = max(0, int(request.values.get('start', 0)))
+        limit = min(max(1, int(request.values.get('limit', 1000))), HEX_SEARCH_MAX_RESULTS)
+    except ValueError:
+        return jsonify({"error": "start and limit must be integers"}), 400
+    
+    try:
+        if encoding == 'hex':
+            needle = bytes.fromhex(pattern.replace('0x', ''))
+        elif encoding == 'ascii':
+            needle = pattern.encode('latin-1')
+        else:
+            return jsonify({"error": "encoding must be 'hex' or 'ascii'"}), 400
+    except ValueError:
+        return jsonify({"error": "Pattern is not valid hex or contains non-ASCII characters"}), 400
+    
+    if not needle:
+        return jsonify({"error": "No pattern provided"}), 400
     
+    try:
+        artifact, error = receive_artifact()
+        if error:
+            return error
+        
+        matches = []
+        truncated = False
+        with mapped_file(artifact["path"]) as mm:
+            position = mm.find(needle, start)
+            while position != -1:
+                if len(matches) == limit:
+                    truncated = True
+                    break
+                matches.append(position)
+                position = mm.find(needle, position + 1)
+        
+        print(f"[POST /exiftool/hex-search] {len(matches)} matches for {needle[:16].hex()} in {artifact['filename']}")
+        
+        return jsonify({
+            "success": True,
+            "handle": artifact["handle"],
+            "filename": artifact["filename"],
+            "fileSize": artifact["size"],
+            "pattern": needle.hex(' '),
+            "matches": matches,
+            "truncated": truncated,
+            # Resume point for the next page of matches
+            "nextStart": matches[-1] + 1 if truncated else None
+        })
+    
+    except Exception as e:
+        print(f"[POST /exiftool/hex-search] error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+# Binary scan settings
+ENTROPY_MAX_BLOCKS = 4096  # block size grows with the file so the map stays this long at most
+ENTROPY_MIN_BLOCK = 4096  # smaller blocks cannot reach the high-entropy threshold
+ENTROPY_MAX_REQUESTED_BLOCK = 1024 * 1024 * 1024  # cap on a client-chosen blockSize
+ENTROPY_SLICE = 1024 * 1024  # bytes histogrammed at once; bincount needs 8x this in scratch memory
+HIGH_ENTROPY_THRESHOLD = 7.5  # bits/byte; compressed or encrypted data sits near 8
+SIGNATURE_SCAN_CHUNK = 8 * 1024 * 1024
+SIGNATURE_SCAN_MAX_HITS = 1000  # per signature
+
+# Signatures searched for anywhere in a file: (search bytes, distance from file start);
+# two-byte magics are skipped as they match too often by chance
+EMBEDDED_SIGNATURES = [(signature, 0) for signature, _ in MAGIC_SIGNATURES if len(signature) >= 3] + [
+    (b"RIFF", 0),
+    (b"ftyp", 4),
+]
+SIGNATURE_PAIRS = {}  # first two bytes -> signatures starting with them
+for _signature, _lead in EMBEDDED_SIGNATURES:
+    SIGNATURE_PAIRS.setdefault(_signature[:2], []).append((_signature, _lead))
+# First three/four bytes of every signature as big-endian uint32 (three-byte ones zero-padded)
+SIGNATURE_PREFIXES_3 = sorted({int.from_bytes(s[:3], 'big') << 8 for s, _ in EMBEDDED_SIGNATURES if len(s) == 3})
+SIGNATURE_PREFIXES_4 = sorted({int.from_bytes(s[:4], 'big') for s, _ in EMBEDDED_SIGNATURES if len(s) >= 4})
+
+
+def entropy_block_size(size):
+    """Smallest power-of-two block size keeping the map within ENTROPY_MAX_BLOCKS"""
+    blocks = -(-size // ENTROPY_MAX_BLOCKS)
+    return max(ENTROPY_MIN_BLOCK, 1 << max(0, blocks - 1).bit_length())
+
+
+def entropy_map(path, size, block_size):
+    """Shannon entropy in bits/byte of each block, histogrammed straight from a memory map"""
+    data = np.memmap(path, dtype=np.uint8, mode='r', shape=(size,))
+    try:
+        starts = np.arange(0, size, block_size)
+        counts = np.zeros((len(starts), 256), dtype=np.int64)
+        for row, start in enumerate(starts.tolist()):
+            end = min(start + block_size, size)
+            # Large blocks are counted in slices so scratch memory stays bounded
+            for offset in range(start, end, ENTROPY_SLICE):
+                counts[row] += np.bincount(data[offset:min(offset + ENTROPY_SLICE, end)], minlength=256)
     finally:
-        try:
-            import shutil
-            shutil.rmtree(temp_dir)
-        except Exception as e:
-            print(f"[cleanup] {str(e)}")
+        del data
+    p = counts / np.minimum(block_size, size - starts)[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logs = np.where(counts > 0, np.log2(p), 0.0)
+    return -(p * logs).sum(axis=1)
+
+
+def high_entropy_regions(values, block_size, size):
+    """Merge consecutive blocks at or above HIGH_ENTROPY_THRESHOLD into byte ranges"""
+    regions = []
+    for index in np.flatnonzero(values >= HIGH_ENTROPY_THRESHOLD).tolist():
+        offset = index * block_size
+        length = min(block_size, size - offset)
+        if regions and regions[-1]["offset"] + regions[-1]["length"] == offset:
+            regions[-1]["length"] += length
+        else:
+            regions.append({"offset": offset, "length": length})
+    return regions
+
+
+def signature_candidates(path, size):
+    """Yield offsets whose first three or four bytes begin some embedded signature, filtered with NumPy"""
+    if size < 3:
+        return
+    table = np.zeros(65536, dtype=bool)
+    for pair in SIGNATURE_PAIRS:
+        table[int.from_bytes(pair, 'big')] = True
+    prefixes_3 = np.array(SIGNATURE_PREFIXES_3, dtype=np.uint32)
+    prefixes_4 = np.array(SIGNATURE_PREFIXES_4, dtype=np.uint32)
+    data = np.memmap(path, dtype=np.uint8, mode='r', shape=(size,))
+    try:
+        for start in range(0, size - 2, SIGNATURE_SCAN_CHUNK):
+            # Three bytes of overlap so prefixes starting near the end of the chunk can be checked
+            chunk = data[start:start + SIGNATURE_SCAN_CHUNK + 3]
+            pairs = min(SIGNATURE_SCAN_CHUNK, len(chunk) - 1)
+            # Big-endian uint16 views at even and odd offsets cover every byte pair without copying
+            even = chunk[:(pairs + 1) // 2 * 2].view('>u2')
+            odd = chunk[1:1 + pairs // 2 * 2].view('>u2')
+            hits = np.concatenate((
+                np.flatnonzero(table.take(even)) * 2,
+                np.flatnonzero(table.take(odd)) * 2 + 1
+            ))
+            hits.sort()
+            # Common pairs ("ID", "MM", "RI", "ft") flood text; narrow them on four bytes before Python sees them
+            quads = np.zeros(len(hits), dtype=np.uint32)
+            for k in range(4):
+                positions = hits + k
+                in_range = positions < len(chunk)
+                quads <<= 8
+                quads |= np.where(in_range, chunk[np.minimum(positions, len(chunk) - 1)], 0).astype(np.uint32)
+            keep = np.isin(quads & 0xFFFFFF00, prefixes_3) | np.isin(quads, prefixes_4)
+            yield from (hits[keep] + start).tolist()
+    finally:
+        del data
+
+
+def iter_signature_matches(mm, path, size):
+    """Yield (offset, signature, lead) for every embedded signature occurrence"""
+    if np is None:
+        for signature, lead in EMBEDDED_SIGNATURES:
+            position = mm.find(signature)
+            while position != -1:
+                yield position, signature, lead
+                position = mm.find(signature, position + 1)
+        return
+    for position in signature_candidates(path, size):
+        for signature, lead in SIGNATURE_PAIRS[mm[position:position + 2]]:
+            if mm[position:position + len(signature)] == signature:
+                yield position, signature, lead
+
+
+def scan_signatures(path, size):
+    """Find embedded files by magic signature; returns (hits sorted by offset, truncated)"""
+    hits = []
+    counts = {}
+    truncated = False
+    with mapped_file(path) as mm:
+        for position, signature, lead in iter_signature_matches(mm, path, size):
+            if counts.get(signature, 0) == SIGNATURE_SCAN_MAX_HITS:
+                truncated = True
+                continue
+            start = position - lead
+            file_type = sniff_magic(bytes(mm[start:start + MAGIC_HEADER_BYTES])) if start >= 0 else None
+            if file_type:
+                hits.append({"offset": start, "type": file_type})
+                counts[signature] = counts.get(signature, 0) + 1
+    hits.sort(key=lambda hit: hit["offset"])
+    return hits, truncated
 
 
-@app.route("/exiftool/remove-metadata", methods=["POST"])
-def remove_metadata():
-    """Remove all metadata from a file"""
-    print("[POST /exiftool/remove-metadata] received request")
+@app.route("/exiftool/binary-scan", methods=["POST"])
+def scan_binary():
+    """Entropy map and embedded-file signature scan of a whole file
+
+    Accepts an uploaded `file` or a stored `handle`. The entropy map needs
+    NumPy and is null without it; `blockSize` can only coarsen the map.
+    """
+    print("[POST /exiftool/binary-scan] received request")
     
-    if 'file' not in request.files:
-        return jsonify({"error": "No file provided"}), 400
+    try:
+        requested_block = max(0, int(request.values.get('blockSize', 0)))
+    except ValueError:
+        return jsonify({"error": "blockSize must be an integer"}), 400
     
-    file = request.files['file']
+    try:
+        artifact, error = receive_artifact()
+        if error:
+            return error
+        
+        size = artifact["size"]
+        # A requested block size can coarsen the map up to one block for the whole file
+        block_size = max(entropy_block_size(size), min(requested_block, size, ENTROPY_MAX_REQUESTED_BLOCK))
+        
+        # Entropy runs on the analysis pool while this thread scans signatures
+        entropy_future = None
+        if np is not None and size:
+            entropy_future = analysis_pool.submit(entropy_map, artifact["path"], size, block_size)
+        
+        signatures, truncated = scan_signatures(artifact["path"], size)
+        
+        entropy = None
+        if entropy_future is not None:
+            values = entropy_future.result()
+            entropy = {
+                "blockSize": block_size,
+                "values": np.round(values, 3).tolist(),
+                "mean": round(float(values.mean()), 3),
+                "max": round(float(values.max()), 3),
+                "highEntropyRegions": high_entropy_regions(values, block_size, size)
+            }
+        
+        print(f"[POST /exiftool/binary-scan] {artifact['filename']}: {len(signatures)} signatures, entropy={'yes' if entropy else 'no'}")
+        
+        return jsonify({
+            "success": True,
+            "handle": artifact["handle"],
+            "filename": artifact["filename"],
+            "fileSize": size,
+            "entropy": entropy,
+            "entropyAvailable": np is not None,
+            "signatures": signatures,
+            "signaturesTruncated": truncated
+        })
     
-    if file.filename == '':
-        return jsonify({"error": "No file selected"}), 400
+    except Exception as e:
+        print(f"[POST /exiftool/binary-scan] error: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+def clean_filename_for(filename):
+    """Download name for a metadata-stripped copy"""
+    name, ext = os.path.splitext(filename)
+    return f"{name}_clean{ext}"
+
+
+def strip_metadata(source_path, clean_path):
+    """Write a copy of source_path without metadata; returns None or an error message"""
+    result = exiftool.run(["-all=", "-o", clean_path, source_path], text=True, timeout=30)
+    if result.returncode != 0:
+        return f"ExifTool error: {result.stderr}"
+    return None
+
+
+@app.route("/exiftool/remove-metadata", methods=["POST"])
+def remove_metadata():
+    """Remove all metadata from a file (an uploaded `file` or a stored `handle`)
+
+    The cleaned file is streamed back as an attachment.
+    """
+    print("[POST /exiftool/remove-metadata] received request")
     
     temp_dir = tempfile.mkdtemp(prefix="exiftool-clean-")
     
     try:
-        # Save uploaded file
-        safe_filename = os.path.basename(file.filename)
-        temp_path = os.path.join(temp_dir, safe_filename)
-        file.save(temp_path)
+        artifact, error = receive_artifact()
+        if error:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return error
         
-        # Create output filename
-        name, ext = os.path.splitext(safe_filename)
-        clean_filename = f"{name}_clean{ext}"
-        clean_path = os.path.join(temp_dir, clean_filename)
+        clean_filename = clean_filename_for(artifact["filename"])
+        clean_path = os.path.join(temp_dir, disk_filename(clean_filename))
         
         # Remove all metadata
-        result = subprocess.run(
-            ["exiftool", "-all=", "-o", clean_path, temp_path],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-        
-        if result.returncode != 0:
-            return jsonify({"error": f"ExifTool error: {result.stderr}"}), 500
+        error = strip_metadata(artifact["path"], clean_path)
+        if error:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return jsonify({"error": error}), 500
         
-        # Read the cleaned file
-        with open(clean_path, 'rb') as f:
-            clean_data = f.read()
-        
-        import base64
-        return jsonify({
-            "success": True,
-            "filename": clean_filename,
-            "data": base64.b64encode(clean_data).decode('utf-8'),
-            "size": len(clean_data),
-            "message": "All metadata has been removed from the file"
-        })
+        response = send_file(clean_path, as_attachment=True, download_name=clean_filename)
+        # Passthrough responses skip close callbacks; iterate the file wrapper so cleanup runs
+        response.direct_passthrough = False
+        response.call_on_close(lambda: shutil.rmtree(temp_dir, ignore_errors=True))
+        return response
     
     except subprocess.TimeoutExpired:
+        shutil.rmtree(temp_dir, ignore_errors=True)
         return jsonify({"error": "Processing timeout"}), 500
     
     except Exception as e:
         print(f"[POST /exiftool/remove-metadata] error: {str(e)}")
+        shutil.rmtree(temp_dir, ignore_errors=True)
         return jsonify({"error": str(e)}), 500
-    
-    finally:
-        try:
-            import shutil
-            shutil.rmtree(temp_dir)
-        except Exception as e:
-            print(f"[cleanup] {str(e)}")
 
 
-@app.route("/ai/analyze", methods=["POST"])
-def ai_analyze():
-    """Analyze text/image using local Ollama AI model"""
+class ZipStream:
+    """Unseekable write target for zipfile; drain() hands out what has been written so far"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def strip_batch_entry(index, filename, source_path, temp_dir):
+    """Strip one batch file into its own directory; returns (index, filename, clean_path, error)"""
+    file_dir = os.path.join(temp_dir, f"clean-{index}")
+    os.mkdir(file_dir)
+    clean_path = os.path.join(file_dir, disk_filename(clean_filename_for(filename)))
     try:
-        message = request.form.get('message', '')
-        image_file = request.files.get('image')
-        
-        # Check if Ollama is available
+        return index, filename, clean_path, strip_metadata(source_path, clean_path)
+    except subprocess.TimeoutExpired:
+        return index, filename, clean_path, "Processing timeout"
+    except Exception as e:
+        return index, filename, clean_path, str(e)
+
+
+@app.route("/exiftool/remove-metadata/batch", methods=["POST"])
+def remove_metadata_batch():
+    """Strip metadata from many files in parallel and stream them back as a zip
+
+    Takes uploaded `files` and/or stored `handles`. Each cleaned file is
+    added to the archive as soon as ExifTool finishes it; files that could
+    not be cleaned are listed in errors.txt at the end of the archive.
+    """
+    print("[POST /exiftool/remove-metadata/batch] received request")
+    
+    files = [file for file in request.files.getlist('files') if file.filename != '']
+    handles = request.values.getlist('handles')
+    
+    if not files and not handles:
+        return jsonify({"error": "No files provided"}), 400
+    
+    if len(files) + len(handles) > BATCH_MAX_FILES:
+        return jsonify({"error": f"Maximum {BATCH_MAX_FILES} files allowed"}), 400
+    
+    # Uploads are saved now: the request body is gone once the zip starts streaming
+    temp_dir = tempfile.mkdtemp(prefix="exiftool-clean-batch-")
+    entries, positions, save_errors = save_batch_uploads(files, temp_dir)
+    sources = [(filename, path) for filename, path, ingest in entries]
+    failures = [(result["filename"], result["error"]) for result in save_errors.values()]
+    leased = []
+    for handle in handles:
+        artifact = artifacts.get(handle)
+        if artifact is None:
+            failures.append((handle, "Unknown or expired handle"))
+        else:
+            leased.append(artifact)
+            sources.append((artifact["filename"], artifact["path"]))
+    
+    stripping = [
+        analysis_pool.submit(strip_batch_entry, index, filename, path, temp_dir)
+        for index, (filename, path) in enumerate(sources)
+    ]
+    
+    def zip_stream():
+        sink = ZipStream()
+        used_names = set()
+        cleaned = 0
+        try:
+            # Cleaned files are already compressed formats; storing avoids burning CPU on deflate
+            with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as archive:
+                for future in as_completed(stripping):
+                    index, filename, clean_path, error = future.result()
+                    if error:
+                        failures.append((filename, error))
+                        continue
+                    arcname = clean_filename_for(filename)
+                    if arcname in used_names:
+                        name, ext = os.path.splitext(arcname)
+                        arcname = f"{name}_{index}{ext}"
+                    used_names.add(arcname)
+                    
+                    info = zipfile.ZipInfo.from_file(clean_path, arcname)
+                    with open(clean_path, 'rb') as source, archive.open(info, 'w') as dest:
+                        while True:
+                            chunk = source.read(INGEST_BUFFER_SIZE)
+                            if not chunk:
+                                break
+                            dest.write(chunk)
+                            yield sink.drain()
+                    yield sink.drain()
+                    os.remove(clean_path)
+                    cleaned += 1
+                
+                if failures:
+                    archive.writestr("errors.txt", "".join(f"{name}: {error}\n" for name, error in failures))
+            yield sink.drain()
+            print(f"[POST /exiftool/remove-metadata/batch] cleaned {cleaned} files, {len(failures)} failed")
+        finally:
+            for future in stripping:
+                future.cancel()
+    
+    def cleanup():
+        # Runs once the response is closed, even if the zip never started streaming
+        for future in stripping:
+            future.cancel()
+        wait(stripping)
+        for artifact in leased:
+            artifacts.release(artifact)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    response = Response(
+        zip_stream(),
+        mimetype="application/zip",
+        headers={"Content-Disposition": "attachment; filename=cleaned_files.zip"}
+    )
+    response.call_on_close(cleanup)
+    return response
+
+
+# Ollama settings (override via environment)
+OLLAMA_URL = os.environ.get("CHAMELEON_OLLAMA_URL", "http://localhost:11434")
+OLLAMA_STATUS_INTERVAL = 30  # seconds between background availability/model refreshes
+OLLAMA_CONNECT_TIMEOUT = 2
+OLLAMA_POOL_SIZE = 8
+OLLAMA_TEXT_MODEL = "llama3.2"
+OLLAMA_VISION_MODEL = "llama3.2-vision"
+AI_STREAM_GRACE_SECONDS = 10  # a streamed analysis with no subscriber for this long is cancelled
+OLLAMA_CONCURRENCY = int(os.environ.get("CHAMELEON_OLLAMA_CONCURRENCY", 1))  # generations in flight at once
+OLLAMA_QUEUE_MAX = int(os.environ.get("CHAMELEON_OLLAMA_QUEUE_MAX", 32))  # waiting requests before rejecting
+OLLAMA_QUEUE_POLL_SECONDS = 1  # how often a waiting request checks whether its client is still there
+PRIORITY_TEXT = 0
+PRIORITY_VISION = 1
+
+OLLAMA_NOT_INSTALLED_MESSAGE = "❌ Ollama is not installed on your system.\n\n📦 Installation Steps:\n\n1. Visit: https://ollama.com\n2. Download Ollama for macOS\n3. Install and open Ollama\n4. Run in Terminal:\n   ollama pull llama3.2\n   ollama pull llama3.2-vision\n\n5. Return here and try again!\n\nℹ️ Ollama runs locally for complete privacy - no data leaves your machine."
+OLLAMA_NOT_RUNNING_MESSAGE = "⚠️ Cannot connect to Ollama server.\n\n▶️ Please start Ollama:\n\n1. Open the Ollama app from Applications\n2. Wait for the menu bar icon to appear\n3. Or run in Terminal: ollama serve\n4. Return here and try again\n\nℹ️ Ollama needs to be running in the background to process requests."
+OLLAMA_TIMEOUT_MESSAGE = "⏱️ Request timed out. Please try a simpler query or check if Ollama is running properly."
+OLLAMA_BUSY_MESSAGE = "⏳ The local model is busy with other requests. Please wait a moment and try again."
+NO_DATA_MESSAGE = "Please provide findings or data to analyze. Paste results from other tools (Maigret, Holehe, TheHarvester, ExifTool, etc.) or provide information you want me to correlate and analyze for patterns, connections, or investigation leads."
+
+
+class OllamaError(Exception):
+    """Raised when Ollama answers a request with an error"""
+
+
+class OllamaUnavailable(OllamaError):
+    """Raised when the Ollama server cannot be reached"""
+
+
+class OllamaModelMissing(OllamaError):
+    """Raised when the requested model has not been pulled"""
+
+    def __init__(self, model):
+        super().__init__(f"model '{model}' not found")
+        self.model = model
+
+
+class OllamaBusy(OllamaError):
+    """Raised when the inference queue is full"""
+
+
+class InferenceCancelled(Exception):
+    """Raised when the client that asked for a generation has gone away"""
+
+
+class OllamaClient:
+    """Ollama HTTP API client on a keep-alive connection pool with cached server status
+
+    Availability (binary installed, server running, pulled models) is
+    refreshed by a background thread, so requests never spawn processes or
+    probe the server before doing real work.
+    """
+
+    def __init__(self, base_url=OLLAMA_URL, interval=OLLAMA_STATUS_INTERVAL):
+        self.base_url = base_url.rstrip("/")
+        self.interval = interval
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=OLLAMA_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._status = {"installed": False, "running": False, "models": [], "checked": 0.0}
+        self._lock = threading.Lock()
+        self._refresher = None
+
+    def status(self, recheck_down=False):
+        """Cached {"installed", "running", "models", "checked"}; refreshed inline only when stale
+
+        With recheck_down a cached "not running" is probed again first, so a
+        server the user has just started is picked up without waiting for
+        the next background refresh.
+        """
+        with self._lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._refresh_loop, daemon=True)
+                self._refresher.start()
+            stale = time.time() - self._status["checked"] > self.interval * 2
+            down = not self._status["running"]
+        if stale or (recheck_down and down):
+            self.refresh()
+        with self._lock:
+            return dict(self._status)
+
+    def refresh(self):
+        models = []
+        running = False
         try:
-            # Check if ollama command exists
-            ollama_check = subprocess.run(
-                ['which', 'ollama'],
-                capture_output=True,
-                text=True
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=(OLLAMA_CONNECT_TIMEOUT, 5))
+            if response.status_code == 200:
+                running = True
+                models = [model.get("name", "") for model in response.json().get("models", [])]
+        except (requests.RequestException, ValueError):
+            pass
+        with self._lock:
+            self._status = {
+                # A reachable server counts as installed even when the CLI is not on PATH (remote/Docker)
+                "installed": running or shutil.which("ollama") is not None,
+                "running": running,
+                "models": models,
+                "checked": time.time(),
+            }
+
+    def generate(self, model, prompt, images=None, timeout=90):
+        """Run a non-streaming /api/generate and return the response text"""
+        payload = {"model": model, "prompt": prompt, "stream": False}
+        if images:
+            payload["images"] = images
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json=payload,
+                timeout=(OLLAMA_CONNECT_TIMEOUT, timeout)
             )
-            
-            if ollama_check.returncode != 0:
-                return jsonify({
-                    "error": "Ollama not found",
-                    "response": "❌ Ollama is not installed on your system.\n\n📦 Installation Steps:\n\n1. Visit: https://ollama.com\n2. Download Ollama for macOS\n3. Install and open Ollama\n4. Run in Terminal:\n   ollama pull llama3.2\n   ollama pull llama3.2-vision\n\n5. Return here and try again!\n\nℹ️ Ollama runs locally for complete privacy - no data leaves your machine."
-                }), 200
-            
-            # Check if Ollama server is running
+        except requests.ConnectionError as e:
+            self._mark_down()
+            raise OllamaUnavailable(str(e))
+        return self._parse(model, response).get("response", "")
+
+    def generate_stream(self, model, prompt, images=None, timeout=90):
+        """Yield response tokens from a streaming /api/generate as they arrive
+
+        Closing the generator closes the HTTP connection, which makes Ollama
+        stop generating. timeout bounds the wait for each token.
+        """
+        payload = {"model": model, "prompt": prompt, "stream": True}
+        if images:
+            payload["images"] = images
+        try:
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json=payload,
+                stream=True,
+                timeout=(OLLAMA_CONNECT_TIMEOUT, timeout)
+            )
+        except requests.ConnectionError as e:
+            self._mark_down()
+            raise OllamaUnavailable(str(e))
+        with response:
+            if response.status_code != 200:
+                self._parse(model, response)
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise OllamaError(chunk["error"])
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    return
+
+    def _parse(self, model, response):
+        try:
+            data = response.json()
+        except ValueError:
+            raise OllamaError(f"Failed to parse Ollama response (HTTP {response.status_code})")
+        error = data.get("error") if isinstance(data, dict) else None
+        if response.status_code == 404 or (error and "not found" in error.lower()):
+            raise OllamaModelMissing(model)
+        if response.status_code != 200 or error:
+            raise OllamaError(error or f"HTTP {response.status_code}")
+        return data
+
+    def _mark_down(self):
+        with self._lock:
+            self._status = {**self._status, "running": False, "checked": time.time()}
+
+    def _refresh_loop(self):
+        while True:
+            self.refresh()
+            time.sleep(self.interval)
+
+
+ollama = OllamaClient()
+
+
+class InferenceQueue:
+    """Admission queue in front of Ollama with bounded concurrency and priorities
+
+    Requests wait for one of `concurrency` slots in (priority, arrival)
+    order, so short text prompts overtake queued vision jobs. A request
+    passes a `cancelled` callable that is polled while it waits and between
+    generated tokens; once it returns True the request leaves the queue or
+    its generation is closed, which stops Ollama.
+    """
+
+    def __init__(self, client, concurrency=OLLAMA_CONCURRENCY, max_waiting=OLLAMA_QUEUE_MAX):
+        self.client = client
+        self.concurrency = concurrency
+        self.max_waiting = max_waiting
+        self.active = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.max_wait = 0.0
+        self._waiting = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    @contextlib.contextmanager
+    def slot(self, priority=PRIORITY_TEXT, cancelled=None):
+        """Hold one generation slot for the duration of the with-block"""
+        ticket = (priority, next(self._seq))
+        started = time.time()
+        with self._cond:
+            if len(self._waiting) >= self.max_waiting:
+                self.rejected += 1
+                raise OllamaBusy(f"{len(self._waiting)} requests already queued")
+            heapq.heappush(self._waiting, ticket)
             try:
-                import requests
-                server_check = requests.get('http://localhost:11434/api/tags', timeout=2)
-                if server_check.status_code != 200:
-                    return jsonify({
-                        "error": "Ollama not running",
-                        "response": "⚠️ Ollama is installed but not running.\n\n▶️ Please start Ollama:\n\n1. Open the Ollama app from Applications\n2. Wait for the menu bar icon to appear\n3. Return here and try again\n\nℹ️ Ollama needs to be running in the background to process requests."
-                    }), 200
-            except:
-                return jsonify({
-                    "error": "Ollama not running",
-                    "response": "⚠️ Cannot connect to Ollama server.\n\n▶️ Please start Ollama:\n\n1. Open the Ollama app from Applications\n2. Wait for the menu bar icon to appear\n3. Or run in Terminal: ollama serve\n4. Return here and try again\n\nℹ️ Ollama needs to be running in the background to process requests."
-                }), 200
-            
-            # First, check if the query contains data/findings to analyze
-            relevance_check = """You are an analysis filter. Determine if the following input contains OSINT findings, data, or information that needs analysis (like usernames, emails, URLs, social media profiles, search results, metadata, etc.).
+                while self._waiting[0] != ticket or self.active >= self.concurrency:
+                    if cancelled is not None and cancelled():
+                        self.cancelled += 1
+                        raise InferenceCancelled("client went away while queued")
+                    self._cond.wait(OLLAMA_QUEUE_POLL_SECONDS)
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._waiting)
+            self.active += 1
+            self.max_wait = max(self.max_wait, time.time() - started)
+            # The next ticket may fit in a slot that is still free
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.active -= 1
+                self.completed += 1
+                self._cond.notify_all()
+
+    def generate(self, model, prompt, images=None, timeout=90, cancelled=None):
+        """Queued OllamaClient.generate; streams internally when it can be cancelled"""
+        if cancelled is None:
+            with self.slot(self.priority(images)):
+                return self.client.generate(model, prompt, images=images, timeout=timeout)
+        with contextlib.closing(self.generate_stream(model, prompt, images, timeout, cancelled)) as tokens:
+            return "".join(tokens)
+
+    def generate_stream(self, model, prompt, images=None, timeout=90, cancelled=None):
+        """Queued OllamaClient.generate_stream, raising InferenceCancelled once cancelled() is true"""
+        with self.slot(self.priority(images), cancelled):
+            with contextlib.closing(self.client.generate_stream(model, prompt, images=images, timeout=timeout)) as tokens:
+                for token in tokens:
+                    yield token
+                    if cancelled is not None and cancelled():
+                        with self._cond:
+                            self.cancelled += 1
+                        raise InferenceCancelled("client went away during generation")
+
+    @staticmethod
+    def priority(images):
+        return PRIORITY_VISION if images else PRIORITY_TEXT
+
+    def stats(self):
+        with self._cond:
+            return {
+                "concurrency": self.concurrency,
+                "active": self.active,
+                "queued": len(self._waiting),
+                "queuedText": sum(1 for priority, _ in self._waiting if priority == PRIORITY_TEXT),
+                "queuedVision": sum(1 for priority, _ in self._waiting if priority == PRIORITY_VISION),
+                "capacity": self.max_waiting,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "rejected": self.rejected,
+                "maxWaitSeconds": round(self.max_wait, 3),
+            }
+
+
+inference = InferenceQueue(ollama)
+
+
+def client_disconnected(environ):
+    """Best-effort check whether the HTTP client behind a WSGI request has hung up"""
+    sock = environ.get("werkzeug.socket")
+    if sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        # A readable socket with nothing to peek at has been closed by the peer
+        return bool(readable) and sock.recv(1, socket.MSG_PEEK) == b""
+    except (OSError, ValueError):
+        return True
+
+
+AI_CACHE_TTL = int(os.environ.get("CHAMELEON_AI_CACHE_TTL", 7 * 24 * 3600))
+AI_CACHE_MEMORY_ITEMS = 256
+AI_CACHE_MAX_BYTES = int(os.environ.get("CHAMELEON_AI_CACHE_MAX_MB", 32)) * 1024 * 1024
+
+
+class AICache(BoundedStore):
+    """AI analysis responses in an in-memory LRU tier backed by SQLite, both expiring after a TTL"""
+
+    def __init__(self, path, ttl=AI_CACHE_TTL, memory_items=AI_CACHE_MEMORY_ITEMS, max_bytes=AI_CACHE_MAX_BYTES):
+        super().__init__(path, "responses", "key", "created", "response TEXT", max_bytes, ttl)
+        self.memory_items = memory_items
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()  # key -> (created, response), least recently used first
+
+    @staticmethod
+    def make_key(model, template, message, image_hash=None):
+        """Cache key for one analysis: model + prompt template + message + image content hash"""
+        template_hash = hashlib.sha256(template.encode("utf-8")).hexdigest()
+        raw = json.dumps([model, template_hash, message.strip(), image_hash])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached response text, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[0] <= self.ttl:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[1]
+            row = self._fetch(key, "created, response")
+            if row is None or now - row[0] > self.ttl:
+                self._memory.pop(key, None)
+                self.misses += 1
+                return None
+            self._remember(key, row[0], row[1])
+            self.disk_hits += 1
+            return row[1]
+
+    def put(self, key, response):
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, response)
+            for evicted in self._store(key, len(response.encode("utf-8")), stamp=created, response=response):
+                self._memory.pop(evicted, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats(),
+                "memoryEntries": len(self._memory),
+                "memoryHits": self.memory_hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+    def _remember(self, key, created, response):
+        self._memory[key] = (created, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+
+ai_cache = AICache(os.path.join(CACHE_DIR, "ai.sqlite3"))
+
+
+@app.route("/ai/status", methods=["GET"])
+def ai_status():
+    """Report cached Ollama availability, installed models, response cache and queue counters"""
+    return jsonify({**ollama.status(), "cache": ai_cache.stats(), "queue": inference.stats()})
+
+
+RELEVANCE_PROMPT = """You are an analysis filter. Determine if the following input contains OSINT findings, data, or information that needs analysis (like usernames, emails, URLs, social media profiles, search results, metadata, etc.).
 
 Respond with ONLY "HAS_DATA" or "NO_DATA" - nothing else.
 
-Input: """ + message
-            
-            # Check if there's actual data to analyze
-            import json
-            relevance_response = subprocess.run(
-                ['curl', '-s', '-X', 'POST', 'http://localhost:11434/api/generate', 
-                 '-H', 'Content-Type: application/json',
-                 '-d', json.dumps({
-                     'model': 'llama3.2',
-                     'prompt': relevance_check,
-                     'stream': False
-                 })],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            
-            if relevance_response.returncode == 0:
-                try:
-                    relevance_data = json.loads(relevance_response.stdout)
-                    relevance_result = relevance_data.get('response', '').strip().upper()
-                    
-                    if 'NO_DATA' in relevance_result or 'NO DATA' in relevance_result:
-                        return jsonify({
-                            "response": "Please provide findings or data to analyze. Paste results from other tools (Maigret, Holehe, TheHarvester, ExifTool, etc.) or provide information you want me to correlate and analyze for patterns, connections, or investigation leads."
-                        }), 200
-                except:
-                    pass  # Continue if relevance check fails
-            
-            # Prepare the analysis prompt
-            osint_prompt = """You are a professional OSINT analysis engine. Your role is to analyze existing findings and data to identify patterns, connections, and additional investigation avenues.
+Input: """
+
+OSINT_PROMPT = """You are a professional OSINT analysis engine. Your role is to analyze existing findings and data to identify patterns, connections, and additional investigation avenues.
 
 Analysis Guidelines:
 - Identify patterns and correlations in the provided data
@@ -1570,134 +3664,208 @@ Analysis Guidelines:
 - No emojis or casual language
 - Focus on actionable intelligence
 
-Analyze the following: """ + message
-            
-            # If image is provided, save it temporarily and use vision model
-            if image_file:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp_file:
-                    image_file.save(tmp_file.name)
-                    tmp_image_path = tmp_file.name
-                
-                try:
-                    # Use vision model for image analysis with proper stdin handling
-                    with open(tmp_image_path, 'rb') as img_file:
-                        # First, try to use the API endpoint (more reliable for images)
-                        import json
-                        api_response = subprocess.run(
-                            ['curl', '-s', 'http://localhost:11434/api/generate', '-d',
-                             json.dumps({
-                                 'model': 'llama3.2-vision',
-                                 'prompt': osint_prompt,
-                                 'stream': False,
-                                 'images': [__import__('base64').b64encode(img_file.read()).decode()]
-                             })],
-                            capture_output=True,
-                            text=True,
-                            timeout=60
-                        )
-                        
-                        if api_response.returncode == 0:
-                            try:
-                                api_data = json.loads(api_response.stdout)
-                                result = type('obj', (object,), {
-                                    'returncode': 0,
-                                    'stdout': api_data.get('response', ''),
-                                    'stderr': ''
-                                })()
-                            except:
-                                # Fallback to CLI if API fails
-                                result = subprocess.run(
-                                    ['ollama', 'run', 'llama3.2-vision', osint_prompt, '<', tmp_image_path],
-                                    capture_output=True,
-                                    text=True,
-                                    timeout=60,
-                                    shell=True
-                                )
-                        else:
-                            # Fallback to CLI
-                            result = subprocess.run(
-                                ['ollama', 'run', 'llama3.2-vision', osint_prompt, '<', tmp_image_path],
-                                capture_output=True,
-                                text=True,
-                                timeout=60,
-                                shell=True
-                            )
-                finally:
-                    # Clean up temp file
-                    try:
-                        os.unlink(tmp_image_path)
-                    except:
-                        pass
+Analyze the following: """
+
+
+def ollama_unready_message(status):
+    """(error, user-facing message) when Ollama cannot take requests, else None"""
+    if not status["installed"]:
+        return "Ollama not found", OLLAMA_NOT_INSTALLED_MESSAGE
+    if not status["running"]:
+        return "Ollama not running", OLLAMA_NOT_RUNNING_MESSAGE
+    return None
+
+
+# Local relevance pre-filter: any of these means the input carries OSINT data
+RELEVANCE_DATA_PATTERNS = [
+    re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"),  # email
+    re.compile(r"\b(?:https?|ftp)://\S+|\bwww\.\S+", re.I),  # URL
+    re.compile(r"\b(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z]{2,24}\b", re.I),  # domain or filename
+    re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b|\b(?:[0-9a-f]{1,4}:){3,7}[0-9a-f]{1,4}\b", re.I),  # IPv4/IPv6
+    re.compile(r"(?<![\w@])@[A-Za-z0-9_.]{2,}"),  # @username
+    re.compile(r"\b[0-9a-f]{32}\b|\b[0-9a-f]{40}\b|\b[0-9a-f]{64}\b", re.I),  # MD5/SHA-1/SHA-256
+    re.compile(r"\+?\d[\d ().-]{7,}\d"),  # phone number
+    re.compile(r"\d+ deg \d+' [\d.]+\"|\b-?\d{1,3}\.\d{4,},\s*-?\d{1,3}\.\d{4,}"),  # GPS coordinates
+    re.compile(r"\[[+*!-]\]"),  # tool output markers like [+] / [*]
+    re.compile(r"\"[\w -]+\"\s*:"),  # JSON keys
+    re.compile(r"^\s*(?:[A-Za-z0-9-]+:)?[A-Za-z][\w /()-]{1,40}\s*[:=]\s*\S.*(?:\n\s*(?:[A-Za-z0-9-]+:)?[A-Za-z][\w /()-]{1,40}\s*[:=]\s*\S.*){2,}", re.M),  # 3+ key: value lines (EXIF, WHOIS)
+    re.compile(r"^[^,\n]*(?:,[^,\n]*)+\n[^,\n]*(?:,[^,\n]*)+$", re.M),  # CSV rows
+]
+# Messages that are only chit-chat or a request for help
+RELEVANCE_CHAT_PATTERN = re.compile(
+    r"^\s*(?:hi|hello|hey|yo|thanks|thank you|test(?:ing)?|help|ok(?:ay)?|good (?:morning|afternoon|evening)"
+    r"|what can you do|who are you|how are you|what is this|how does this work)\b[\s!?.,]*"
+    r"(?:there|please|again|ollama)?[\s!?.,]*$",
+    re.I
+)
+
+
+def classify_relevance(message, has_image=False):
+    """Classify input as "HAS_DATA" or "NO_DATA" locally, or None when only the LLM can tell"""
+    if has_image:
+        return "HAS_DATA"
+    if not message.strip() or RELEVANCE_CHAT_PATTERN.match(message):
+        return "NO_DATA"
+    if any(pattern.search(message) for pattern in RELEVANCE_DATA_PATTERNS):
+        return "HAS_DATA"
+    return None
+
+
+def has_relevant_data(message, has_image=False, cancelled=None):
+    """Whether the input holds anything to analyze; the LLM is asked only when the local check is unsure"""
+    verdict = classify_relevance(message, has_image)
+    if verdict is not None:
+        return verdict == "HAS_DATA"
+    try:
+        verdict = inference.generate(
+            OLLAMA_TEXT_MODEL, RELEVANCE_PROMPT + message, timeout=30, cancelled=cancelled
+        ).strip().upper()
+    except (OllamaUnavailable, OllamaBusy):
+        raise
+    except (OllamaError, requests.Timeout):
+        return True  # Continue if relevance check fails
+    return not ('NO_DATA' in verdict or 'NO DATA' in verdict)
+
+
+def ai_error_message(error):
+    """User-facing text for an exception raised while talking to Ollama"""
+    if isinstance(error, OllamaModelMissing):
+        return f"❌ Model '{error.model}' not found.\n\n📥 Please install the model:\n\nRun in Terminal:\n  ollama pull {error.model}\n\nℹ️ First download may take a few minutes (models are 2-4GB).\n\nOnce complete, return here and try again!"
+    if isinstance(error, OllamaUnavailable):
+        return OLLAMA_NOT_RUNNING_MESSAGE
+    if isinstance(error, OllamaBusy):
+        return OLLAMA_BUSY_MESSAGE
+    if isinstance(error, OllamaError):
+        return f"⚠️ Ollama error: {str(error)}\n\nℹ️ Make sure Ollama is running and models are installed:\n  ollama pull llama3.2\n  ollama pull llama3.2-vision"
+    if isinstance(error, requests.Timeout):
+        return OLLAMA_TIMEOUT_MESSAGE
+    return f"⚠️ Error: {str(error)}\n\nMake sure Ollama is installed and running:\n1. Visit https://ollama.com\n2. Install Ollama\n3. Run: ollama pull llama3.2"
+
+
+def run_ai_stream(job, message, image_data, model, cache_key):
+    """Stream an analysis into job as `token` events, cancelling once no client is listening"""
+    push = job.push
+    cancelled = lambda: job.abandoned(AI_STREAM_GRACE_SECONDS)
+    try:
+        unready = ollama_unready_message(ollama.status(recheck_down=True))
+        if unready:
+            push("token", {"text": unready[1]})
+            job.failed = True
+            return
+        if not has_relevant_data(message, bool(image_data), cancelled):
+            ai_cache.put(cache_key, NO_DATA_MESSAGE)
+            push("token", {"text": NO_DATA_MESSAGE})
+            return
+        
+        images = [image_data] if image_data else None
+        parts = []
+        tokens = inference.generate_stream(model, OSINT_PROMPT + message, images=images, cancelled=cancelled)
+        with contextlib.closing(tokens):
+            for token in tokens:
+                parts.append(token)
+                push("token", {"text": token})
+        response_text = "".join(parts).strip()
+        if response_text:
+            ai_cache.put(cache_key, response_text)
+    except InferenceCancelled as e:
+        print(f"[AI][job {job.id}] no subscribers, {e}")
+        job.failed = True
+    except Exception as e:
+        print(f"[AI Error][job {job.id}] {str(e)}")
+        push("token", {"text": ai_error_message(e)})
+        job.failed = True
+    finally:
+        push("done")
+        job.finish()
+
+
+@app.route("/ai/analyze", methods=["POST"])
+def ai_analyze():
+    """Analyze text/image using local Ollama AI model
+
+    With `stream=1` the response is {"jobId"} and /stream/<job_id> carries
+    one `token` event per generated chunk followed by `done`.
+    """
+    try:
+        message = request.form.get('message', '')
+        image_file = request.files.get('image')
+        image_bytes = image_file.read() if image_file else None
+        image_data = base64.b64encode(image_bytes).decode() if image_bytes else None
+        model = OLLAMA_VISION_MODEL if image_data else OLLAMA_TEXT_MODEL
+        
+        # Repeated analyses of the same input are answered without touching the model
+        cache_key = AICache.make_key(
+            model, OSINT_PROMPT, message,
+            hashlib.sha256(image_bytes).hexdigest() if image_bytes else None
+        )
+        cached = ai_cache.get(cache_key)
+        
+        if request.values.get('stream') in ('1', 'true'):
+            try:
+                job = jobs.create()
+            except RegistryFull as e:
+                return busy_response(e)
+            if cached is not None:
+                job.push("token", {"text": cached, "cached": True})
+                job.push("done")
+                job.finish()
             else:
-                # Text-only analysis using API
-                import json
-                api_response = subprocess.run(
-                    ['curl', '-s', '-X', 'POST', 'http://localhost:11434/api/generate', 
-                     '-H', 'Content-Type: application/json',
-                     '-d', json.dumps({
-                         'model': 'llama3.2',
-                         'prompt': osint_prompt,
-                         'stream': False
-                     })],
-                    capture_output=True,
-                    text=True,
-                    timeout=90
-                )
-                
-                if api_response.returncode == 0:
-                    try:
-                        api_data = json.loads(api_response.stdout)
-                        result = type('obj', (object,), {
-                            'returncode': 0,
-                            'stdout': api_data.get('response', ''),
-                            'stderr': ''
-                        })()
-                    except Exception as e:
-                        result = type('obj', (object,), {
-                            'returncode': 1,
-                            'stdout': '',
-                            'stderr': f'Failed to parse Ollama response: {str(e)}'
-                        })()
-                else:
-                    result = type('obj', (object,), {
-                        'returncode': 1,
-                        'stdout': '',
-                        'stderr': 'Failed to connect to Ollama API'
-                    })()
+                threading.Thread(
+                    target=run_ai_stream,
+                    args=(job, message, image_data, model, cache_key),
+                    daemon=True
+                ).start()
+            print(f"[POST /ai/analyze] respond -> {{ jobId: \"{job.id}\" }}")
+            return jsonify({"jobId": job.id})
+        
+        if cached is not None:
+            return jsonify({"response": cached, "cached": True}), 200
+        
+        try:
+            unready = ollama_unready_message(ollama.status(recheck_down=True))
+            if unready:
+                return jsonify({"error": unready[0], "response": unready[1]}), 200
+            
+            # Generations are abandoned if the browser gives up while they queue or run
+            environ = request.environ
+            cancelled = lambda: client_disconnected(environ)
+            
+            # First, check if the query contains data/findings to analyze
+            if not has_relevant_data(message, bool(image_data), cancelled):
+                ai_cache.put(cache_key, NO_DATA_MESSAGE)
+                return jsonify({"response": NO_DATA_MESSAGE}), 200
             
-            if result.returncode != 0:
-                error_msg = result.stderr or "Unknown error"
-                if "model" in error_msg.lower() and "not found" in error_msg.lower():
-                    model_needed = "llama3.2-vision" if image_file else "llama3.2"
-                    return jsonify({
-                        "response": f"❌ Model '{model_needed}' not found.\n\n📥 Please install the model:\n\nRun in Terminal:\n  ollama pull {model_needed}\n\nℹ️ First download may take a few minutes (models are 2-4GB).\n\nOnce complete, return here and try again!"
-                    }), 200
-                elif "server" in error_msg.lower() or "connect" in error_msg.lower():
-                    return jsonify({
-                        "response": "⚠️ Cannot connect to Ollama server.\n\n▶️ Please start Ollama:\n\n1. Open Ollama app from Applications\n2. Or run: ollama serve\n3. Try again"
-                    }), 200
-                else:
-                    return jsonify({
-                        "response": f"⚠️ Ollama error: {error_msg}\n\nℹ️ Make sure Ollama is running and models are installed:\n  ollama pull llama3.2\n  ollama pull llama3.2-vision"
-                    }), 200
+            # If image is provided, use the vision model
+            if image_data:
+                response_text = inference.generate(
+                    model, OSINT_PROMPT + message, images=[image_data], timeout=60, cancelled=cancelled
+                )
+            else:
+                response_text = inference.generate(model, OSINT_PROMPT + message, timeout=90, cancelled=cancelled)
             
-            response_text = result.stdout.strip()
+            response_text = response_text.strip()
             
-            if not response_text:
+            if response_text:
+                ai_cache.put(cache_key, response_text)
+            else:
                 response_text = "I apologize, but I couldn't generate a response. Please try again."
             
             return jsonify({"response": response_text}), 200
-            
-        except subprocess.TimeoutExpired:
-            return jsonify({
-                "response": "⏱️ Request timed out. Please try a simpler query or check if Ollama is running properly."
-            }), 200
+        
+        except OllamaUnavailable as e:
+            return jsonify({"error": "Ollama not running", "response": ai_error_message(e)}), 200
+        
+        except OllamaBusy as e:
+            print(f"[AI] queue full: {e}")
+            return jsonify({"error": "Ollama busy", "response": ai_error_message(e)}), 200
+        
+        except InferenceCancelled as e:
+            print(f"[AI] {e}")
+            return jsonify({"error": "Client disconnected"}), 499
             
         except Exception as e:
             print(f"[AI Error] {str(e)}")
-            return jsonify({
-                "response": f"⚠️ Error: {str(e)}\n\nMake sure Ollama is installed and running:\n1. Visit https://ollama.com\n2. Install Ollama\n3. Run: ollama pull llama3.2"
-            }), 200
+            return jsonify({"response": ai_error_message(e)}), 200
             
     except Exception as e:
         print(f"[AI Error] {str(e)}")
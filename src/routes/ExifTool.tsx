@@ -5,7 +5,7 @@ import './ExifTool.css'
 interface ExifToolResult {
   filename: string
   metadata: Record<string, any>
-  thumbnails: Array<{type: string; data: string}>
+  thumbnails: Array<{type: string; hash: string; url: string; size: number}>
   hashes: {MD5: string; SHA256: string}
   fileVerification: {
     extensionMatches: boolean
@@ -31,6 +31,7 @@ interface ExifToolResult {
     modified: string
     created: string
   }
+  handle?: string
   success?: boolean
   error?: string
 }
@@ -41,6 +42,30 @@ interface HexDump {
   ascii: string
 }
 
+interface HexPage {
+  handle: string
+  filename: string
+  fileSize: number
+  offset: number
+  length: number
+  hexDump: HexDump[]
+}
+
+interface BinaryScan {
+  entropy: {
+    blockSize: number
+    values: number[]
+    mean: number
+    max: number
+    highEntropyRegions: Array<{offset: number; length: number}>
+  } | null
+  entropyAvailable: boolean
+  signatures: Array<{offset: number; type: string}>
+  signaturesTruncated: boolean
+}
+
+const HEX_PAGE_SIZE = 2048
+
 type Mode = 'single' | 'batch' | 'compare' | 'hex'
 
 export default function ExifTool() {
@@ -51,7 +76,11 @@ export default function ExifTool() {
   const [selectedFiles, setSelectedFiles] = useState<File[]>([])
   const [result, setResult] = useState<ExifToolResult | null>(null)
   const [batchResults, setBatchResults] = useState<ExifToolResult[]>([])
-  const [hexData, setHexData] = useState<{filename: string; fileSize: number; hexDump: HexDump[]} | null>(null)
+  const [hexData, setHexData] = useState<HexPage | null>(null)
+  const [hexPattern, setHexPattern] = useState('')
+  const [hexEncoding, setHexEncoding] = useState<'ascii' | 'hex'>('ascii')
+  const [hexMatches, setHexMatches] = useState<{offsets: number[]; truncated: boolean} | null>(null)
+  const [binaryScan, setBinaryScan] = useState<BinaryScan | null>(null)
   const [isProcessing, setIsProcessing] = useState(false)
   const [error, setError] = useState<string | null>(null)
   const [isDragging, setIsDragging] = useState(false)
@@ -136,23 +165,40 @@ export default function ExifTool() {
     files.forEach(file => formData.append('files', file))
 
     try {
-      const response = await fetch(`${RUNNER_URL}/exiftool/batch-analyze`, {
+      const response = await fetch(`${RUNNER_URL}/exiftool/batch-analyze?stream=ndjson`, {
         method: 'POST',
         body: formData,
       })
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         throw new Error(`Batch analysis failed: ${response.status}`)
       }
 
-      const data = await response.json()
-      setBatchResults(data.results)
-      
+      // One JSON line per file, in completion order; keep upload order on screen
+      const results: ExifToolResult[] = []
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffered = ''
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffered += decoder.decode(value, { stream: true })
+        const lines = buffered.split('\n')
+        buffered = lines.pop() || ''
+        for (const line of lines) {
+          if (!line.trim()) continue
+          const { index, ...fileResult } = JSON.parse(line)
+          if (typeof index !== 'number') throw new Error(fileResult.error || 'Batch analysis failed')
+          results[index] = fileResult
+        }
+        setBatchResults(results.filter(Boolean))
+      }
+
       // For compare mode, extract all unique keys
       if (mode === 'compare') {
         const allKeys = new Set<string>()
-        data.results.forEach((r: ExifToolResult) => {
-          Object.keys(r.metadata).forEach(key => allKeys.add(key))
+        results.filter(Boolean).forEach((r: ExifToolResult) => {
+          Object.keys(r.metadata || {}).forEach(key => allKeys.add(key))
         })
         setCompareKeys(Array.from(allKeys).sort())
       }
@@ -163,15 +209,15 @@ export default function ExifTool() {
     }
   }
 
-  const handleHexDump = async (file: File) => {
+  // The first page uploads the file; later pages reuse the stored upload by handle
+  const loadHexPage = async (source: File | string, offset: number) => {
     setIsProcessing(true)
     setError(null)
-    setHexData(null)
 
     const formData = new FormData()
-    formData.append('file', file)
-    formData.append('offset', '0')
-    formData.append('length', '2048')  // First 2KB
+    formData.append(typeof source === 'string' ? 'handle' : 'file', source)
+    formData.append('offset', String(offset))
+    formData.append('length', String(HEX_PAGE_SIZE))
 
     try {
       const response = await fetch(`${RUNNER_URL}/exiftool/hex-dump`, {
@@ -179,6 +225,11 @@ export default function ExifTool() {
         body: formData,
       })
 
+      // Stored upload expired: send the file again
+      if (response.status === 404 && typeof source === 'string' && selectedFile) {
+        return loadHexPage(selectedFile, offset)
+      }
+
       if (!response.ok) {
         throw new Error(`Hex dump failed: ${response.status}`)
       }
@@ -192,12 +243,86 @@ export default function ExifTool() {
     }
   }
 
+  const handleHexDump = (file: File) => {
+    setHexData(null)
+    setHexMatches(null)
+    setBinaryScan(null)
+    loadHexPage(file, 0)
+  }
+
+  const handleBinaryScan = async () => {
+    if (!hexData) return
+
+    setIsProcessing(true)
+    setError(null)
+
+    const formData = new FormData()
+    formData.append('handle', hexData.handle)
+
+    try {
+      const response = await fetch(`${RUNNER_URL}/exiftool/binary-scan`, {
+        method: 'POST',
+        body: formData,
+      })
+
+      const data = await response.json()
+      if (!response.ok) {
+        throw new Error(data.error || `Scan failed: ${response.status}`)
+      }
+
+      setBinaryScan(data)
+    } catch (err: any) {
+      setError(err.message || 'Failed to scan file')
+    } finally {
+      setIsProcessing(false)
+    }
+  }
+
+  const jumpToOffset = (offset: number) => {
+    if (hexData) loadHexPage(hexData.handle, offset - (offset % HEX_PAGE_SIZE))
+  }
+
+  const handleHexSearch = async () => {
+    if (!hexData || !hexPattern) return
+
+    setIsProcessing(true)
+    setError(null)
+
+    const formData = new FormData()
+    formData.append('handle', hexData.handle)
+    formData.append('pattern', hexPattern)
+    formData.append('encoding', hexEncoding)
+
+    try {
+      const response = await fetch(`${RUNNER_URL}/exiftool/hex-search`, {
+        method: 'POST',
+        body: formData,
+      })
+
+      const data = await response.json()
+      if (!response.ok) {
+        throw new Error(data.error || `Search failed: ${response.status}`)
+      }
+
+      setHexMatches({ offsets: data.matches, truncated: data.truncated })
+    } catch (err: any) {
+      setError(err.message || 'Failed to search file')
+    } finally {
+      setIsProcessing(false)
+    }
+  }
+
   const handleRemoveMetadata = async () => {
     if (!selectedFile) return
 
     setIsRemovingMetadata(true)
     const formData = new FormData()
-    formData.append('file', selectedFile)
+    // Reuse the upload stored during analysis when the backend still has it
+    if (result?.handle) {
+      formData.append('handle', result.handle)
+    } else {
+      formData.append('file', selectedFile)
+    }
 
     try {
       const response = await fetch(`${RUNNER_URL}/exiftool/remove-metadata`, {
@@ -209,24 +334,12 @@ export default function ExifTool() {
         throw new Error(`Failed to remove metadata: ${response.status}`)
       }
 
-      const data = await response.json()
-      
-      const byteCharacters = atob(data.data)
-      const byteNumbers = new Array(byteCharacters.length)
-      for (let i = 0; i < byteCharacters.length; i++) {
-        byteNumbers[i] = byteCharacters.charCodeAt(i)
-      }
-      const byteArray = new Uint8Array(byteNumbers)
-      const blob = new Blob([byteArray])
-      
-      const url = URL.createObjectURL(blob)
-      const a = document.createElement('a')
-      a.href = url
-      a.download = data.filename
-      document.body.appendChild(a)
-      a.click()
-      document.body.removeChild(a)
-      URL.revokeObjectURL(url)
+      // The cleaned file comes back as raw bytes
+      const dot = selectedFile.name.lastIndexOf('.')
+      const cleanName = dot > 0
+        ? `${selectedFile.name.slice(0, dot)}_clean${selectedFile.name.slice(dot)}`
+        : `${selectedFile.name}_clean`
+      saveBlob(await response.blob(), cleanName)
 
       alert('Metadata removed successfully! File downloaded.')
     } catch (err: any) {
@@ -236,6 +349,42 @@ export default function ExifTool() {
     }
   }
 
+  const handleRemoveMetadataBatch = async () => {
+    if (selectedFiles.length === 0) return
+
+    setIsRemovingMetadata(true)
+    const formData = new FormData()
+    selectedFiles.forEach(file => formData.append('files', file))
+
+    try {
+      const response = await fetch(`${RUNNER_URL}/exiftool/remove-metadata/batch`, {
+        method: 'POST',
+        body: formData,
+      })
+
+      if (!response.ok) {
+        throw new Error(`Failed to remove metadata: ${response.status}`)
+      }
+
+      saveBlob(await response.blob(), 'cleaned_files.zip')
+    } catch (err: any) {
+      alert(`Error: ${err.message || 'Failed to remove metadata'}`)
+    } finally {
+      setIsRemovingMetadata(false)
+    }
+  }
+
+  const saveBlob = (blob: Blob, filename: string) => {
+    const url = URL.createObjectURL(blob)
+    const a = document.createElement('a')
+    a.href = url
+    a.download = filename
+    document.body.appendChild(a)
+    a.click()
+    document.body.removeChild(a)
+    URL.revokeObjectURL(url)
+  }
+
   const handleDownload = () => {
     if (!result) return
 
@@ -489,7 +638,7 @@ export default function ExifTool() {
 
             <p className="upload-hint">
               {mode === 'single' && 'Comprehensive metadata analysis with GPS, device info, and more'}
-              {mode === 'batch' && 'Analyze up to 20 files at once'}
+              {mode === 'batch' && 'Analyze hundreds of files at once'}
               {mode === 'compare' && 'Compare metadata across multiple files side-by-side'}
               {mode === 'hex' && 'View raw binary data in hexadecimal format'}
             </p>
@@ -574,7 +723,9 @@ export default function ExifTool() {
                     <div className="thumbnails-container">
                       {result.thumbnails.map((thumb, idx) => (
                         <div key={idx} className="thumbnail">
-                          <img src={`data:image/jpeg;base64,${thumb.data}`} alt={thumb.type} />
+                          <a href={`${RUNNER_URL}${thumb.url}`} target="_blank" rel="noreferrer">
+                            <img src={`${RUNNER_URL}${thumb.url}?size=256`} alt={thumb.type} loading="lazy" />
+                          </a>
                           <span className="thumbnail-label">{thumb.type}</span>
                         </div>
                       ))}
@@ -662,9 +813,14 @@ export default function ExifTool() {
                 <h2>Batch Analysis Results</h2>
                 <p className="results-filename">{batchResults.length} files analyzed</p>
               </div>
-              <button onClick={handleDownloadBatch} className="download-button">
-                💾 Download Batch Report
-              </button>
+              <div className="header-actions">
+                <button onClick={handleRemoveMetadataBatch} className="remove-metadata-button" disabled={isRemovingMetadata}>
+                  {isRemovingMetadata ? 'Removing...' : '🗑️ Remove All Metadata (ZIP)'}
+                </button>
+                <button onClick={handleDownloadBatch} className="download-button">
+                  💾 Download Batch Report
+                </button>
+              </div>
             </div>
 
             <div className="batch-grid">
@@ -784,7 +940,89 @@ export default function ExifTool() {
                 <h2>Hexadecimal View</h2>
                 <p className="results-filename">{hexData.filename} ({hexData.fileSize} bytes)</p>
               </div>
+              <div className="header-actions">
+                <button onClick={handleBinaryScan} className="download-button" disabled={isProcessing}>
+                  🔬 Scan for Hidden Data
+                </button>
+              </div>
+            </div>
+
+            {binaryScan && (
+              <div className="binary-scan">
+                {binaryScan.entropy ? (
+                  <>
+                    <div className="entropy-strip" title="Entropy per block (bits/byte)">
+                      {binaryScan.entropy.values.map((value, idx) => (
+                        <span
+                          key={idx}
+                          className={value >= 7.5 ? 'entropy-high' : undefined}
+                          style={{ height: `${(value / 8) * 100}%` }}
+                          onClick={() => jumpToOffset(idx * binaryScan.entropy!.blockSize)}
+                        />
+                      ))}
+                    </div>
+                    <p>
+                      Mean entropy {binaryScan.entropy.mean} bits/byte, max {binaryScan.entropy.max}.
+                      {binaryScan.entropy.highEntropyRegions.length > 0 && ' Possibly compressed or encrypted:'}
+                    </p>
+                    <div className="hex-matches">
+                      {binaryScan.entropy.highEntropyRegions.map(region => (
+                        <button key={region.offset} onClick={() => jumpToOffset(region.offset)}>
+                          {region.offset.toString(16).padStart(8, '0')} (+{region.length.toLocaleString()})
+                        </button>
+                      ))}
+                    </div>
+                  </>
+                ) : (
+                  <p>{binaryScan.entropyAvailable ? 'File is empty.' : 'Entropy map unavailable: install NumPy on the backend.'}</p>
+                )}
+                <p>
+                  {binaryScan.signatures.length === 0 ? 'No embedded file signatures found.' : 'Embedded file signatures:'}
+                  {binaryScan.signaturesTruncated && ' (truncated)'}
+                </p>
+                <div className="hex-matches">
+                  {binaryScan.signatures.map(hit => (
+                    <button key={`${hit.offset}-${hit.type}`} onClick={() => jumpToOffset(hit.offset)}>
+                      {hit.type.toUpperCase()} @ {hit.offset.toString(16).padStart(8, '0')}
+                    </button>
+                  ))}
+                </div>
+              </div>
+            )}
+
+            <div className="hex-search">
+              <input
+                type="text"
+                value={hexPattern}
+                onChange={(e) => setHexPattern(e.target.value)}
+                onKeyDown={(e) => e.key === 'Enter' && handleHexSearch()}
+                placeholder={hexEncoding === 'hex' ? 'ff d8 ff' : 'Text to find'}
+              />
+              <select value={hexEncoding} onChange={(e) => setHexEncoding(e.target.value as 'ascii' | 'hex')}>
+                <option value="ascii">ASCII</option>
+                <option value="hex">Hex</option>
+              </select>
+              <button onClick={handleHexSearch} disabled={isProcessing || !hexPattern}>
+                Find
+              </button>
             </div>
+            {hexMatches && (
+              <div className="hex-matches">
+                {hexMatches.offsets.length === 0 ? 'No matches' : (
+                  <>
+                    {hexMatches.offsets.length}{hexMatches.truncated ? '+' : ''} matches:
+                    {hexMatches.offsets.slice(0, 100).map(offset => (
+                      <button
+                        key={offset}
+                        onClick={() => jumpToOffset(offset)}
+                      >
+                        {offset.toString(16).padStart(8, '0')}
+                      </button>
+                    ))}
+                  </>
+                )}
+              </div>
+            )}
 
             <div className="hex-viewer">
               <div className="hex-header">
@@ -800,7 +1038,24 @@ export default function ExifTool() {
                 </div>
               ))}
             </div>
-            <p className="hex-note">Showing first 2KB of file. For full binary analysis, use specialized forensic tools.</p>
+            <div className="hex-pager">
+              <button
+                onClick={() => loadHexPage(hexData.handle, Math.max(0, hexData.offset - HEX_PAGE_SIZE))}
+                disabled={isProcessing || hexData.offset === 0}
+              >
+                ← Previous
+              </button>
+              <span>
+                Bytes {hexData.offset.toLocaleString()}–{(hexData.offset + hexData.length).toLocaleString()} of {hexData.fileSize.toLocaleString()}
+              </span>
+              <button
+                onClick={() => loadHexPage(hexData.handle, hexData.offset + HEX_PAGE_SIZE)}
+                disabled={isProcessing || hexData.offset + hexData.length >= hexData.fileSize}
+              >
+                Next →
+              </button>
+            </div>
+            <p className="hex-note">The file is uploaded once; paging reuses the stored copy. For full binary analysis, use specialized forensic tools.</p>
           </div>
         </div>
       )}
@@ -80,6 +80,9 @@ export default function Ollama() {
         formData.append('image', selectedImage)
       }
 
+      // Stream tokens over SSE so the answer appears as it is generated
+      formData.append('stream', '1')
+
       const response = await fetch(`${RUNNER_URL}/ai/analyze`, {
         method: 'POST',
         body: formData,
@@ -89,16 +92,44 @@ export default function Ollama() {
         throw new Error('Failed to get AI response')
       }
 
-      const data = await response.json()
+      const { jobId } = await response.json()
+      if (!jobId) {
+        throw new Error('Failed to get AI response')
+      }
 
-      const assistantMessage: Message = {
-        id: (Date.now() + 1).toString(),
+      const assistantId = (Date.now() + 1).toString()
+      setMessages(prev => [...prev, {
+        id: assistantId,
         role: 'assistant',
-        content: data.response || 'I apologize, but I couldn\'t generate a response.',
+        content: '',
         timestamp: new Date()
+      }])
+      const updateAssistant = (update: (content: string) => string) => {
+        setMessages(prev => prev.map(m => m.id === assistantId ? { ...m, content: update(m.content) } : m))
       }
 
-      setMessages(prev => [...prev, assistantMessage])
+      await new Promise<void>((resolve, reject) => {
+        const eventSource = new EventSource(`${RUNNER_URL}/stream/${jobId}`)
+
+        eventSource.onmessage = (event) => {
+          const msg = JSON.parse(event.data)
+          if (msg.type === 'token') {
+            updateAssistant(content => content + msg.text)
+          } else if (msg.type === 'done') {
+            eventSource.close()
+            resolve()
+          }
+        }
+
+        eventSource.onerror = () => {
+          // Transient drops reconnect on their own and resume via Last-Event-ID
+          if (eventSource.readyState === EventSource.CLOSED) {
+            reject(new Error('AI stream interrupted'))
+          }
+        }
+      })
+
+      updateAssistant(content => content.trim() || 'I apologize, but I couldn\'t generate a response.')
     } catch (err) {
       console.error(err)
       const errorMessage: Message = {